@@ -1,6 +1,6 @@
 {
     'name': 'Jewelry Base',
-    'version': '18.0.1.0.2',
+    'version': '18.0.1.3.0',
     'category': 'Sales',
     'summary': 'Base module for jewelry business operations',
     'description': """
@@ -9,6 +9,8 @@
         Features:
         - Security groups (Operator / Manager)
         - Base configuration parameters
+        - Cached per-company settings service (jewelry.settings)
+        - Cached image renditions (thumbnails) by attachment checksum
     """,
     'author': 'NarimERP',
     'website': 'https://github.com/yourusername/NarimERP',
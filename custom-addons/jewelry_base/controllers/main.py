@@ -0,0 +1,31 @@
+from werkzeug.exceptions import NotFound
+
+from odoo import http
+from odoo.http import request
+
+from ..models.image_rendition import RENDITION_SIZES
+
+
+class JewelryImageController(http.Controller):
+
+    @http.route('/jewelry/image/<int:attachment_id>/<string:size>', type='http', auth='user')
+    def jewelry_image_rendition(self, attachment_id, size, unique=None, **kwargs):
+        """Sirve la versión reducida de un adjunto de imagen.
+
+        El acceso se comprueba sobre el adjunto original; la versión se
+        genera bajo demanda si todavía no existe.
+        """
+        if size not in RENDITION_SIZES:
+            raise NotFound()
+        attachment = request.env['ir.binary']._find_record(
+            res_model='ir.attachment', res_id=attachment_id,
+        )
+        rendition = request.env['jewelry.image.rendition'].sudo()._get_renditions(
+            attachment, size,
+        ).get(attachment.id)
+        if not rendition:
+            return request.redirect(f'/web/image/{attachment.id}')
+        stream = request.env['ir.binary']._get_stream_from(
+            rendition, 'datas', mimetype=rendition.mimetype,
+        )
+        return stream.get_response(immutable=bool(unique))
@@ -1 +1,3 @@
+from . import image_rendition
+from . import jewelry_settings
 from . import res_config_settings
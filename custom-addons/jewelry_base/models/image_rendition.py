@@ -0,0 +1,133 @@
+import base64
+import logging
+
+from psycopg2 import IntegrityError
+
+from odoo import api, fields, models
+from odoo.exceptions import UserError
+from odoo.tools.image import image_process
+from odoo.tools.mimetypes import guess_mimetype
+
+_logger = logging.getLogger(__name__)
+
+# Versiones reducidas: nombre -> (ancho máximo, alto máximo, calidad JPEG)
+RENDITION_SIZES = {
+    'small': (256, 256, 80),
+    'medium': (1024, 1024, 85),
+    # Huecos de 120 px del informe policial: nítida al imprimir, pocos KB
+    'report': (480, 480, 70),
+}
+
+
+class ImageRendition(models.Model):
+    """Versiones reducidas de imágenes adjuntas, cacheadas por checksum.
+
+    Dos adjuntos con el mismo contenido comparten la misma versión, y
+    una vez generada no se vuelve a procesar la imagen original.
+    """
+
+    _name = 'jewelry.image.rendition'
+    _description = 'Image Rendition'
+
+    checksum = fields.Char(
+        string='Checksum',
+        required=True,
+        index=True,
+        readonly=True,
+        help='Checksum SHA1 del contenido original',
+    )
+    size = fields.Selection(
+        selection=[
+            ('small', 'Small'),
+            ('medium', 'Medium'),
+            ('report', 'Report'),
+        ],
+        string='Size',
+        required=True,
+        readonly=True,
+    )
+    datas = fields.Binary(
+        string='Image',
+        attachment=True,
+        readonly=True,
+    )
+    mimetype = fields.Char(
+        string='Mime Type',
+        readonly=True,
+    )
+
+    _sql_constraints = [
+        ('checksum_size_unique', 'UNIQUE(checksum, size)',
+         'Only one rendition per image and size!'),
+    ]
+
+    @api.model
+    def _prepare_rendition_vals(self, raw, checksum, size):
+        """Valores de creación de la versión reducida de `raw` (bytes).
+
+        Returns:
+            dict de valores, o None si el contenido no es una imagen válida;
+            quien la pide usa entonces el original
+        """
+        max_width, max_height, quality = RENDITION_SIZES[size]
+        try:
+            data = image_process(
+                raw,
+                size=(max_width, max_height),
+                quality=quality,
+                output_format='JPEG',
+            )
+        except (UserError, ValueError, OSError):
+            # OSError: fichero dañado o truncado que PIL no puede decodificar
+            _logger.warning("No se pudo generar la versión %s de la imagen %s", size, checksum)
+            return None
+        return {
+            'checksum': checksum,
+            'size': size,
+            'datas': base64.b64encode(data),
+            # image_process devuelve el original si no hace falta reducirlo (un PNG pequeño)
+            'mimetype': guess_mimetype(data, default='image/jpeg'),
+        }
+
+    @api.model
+    def _get_renditions(self, attachments, size):
+        """Devuelve {attachment_id: rendition}, generando las que falten.
+
+        Solo se procesan los adjuntos de tipo imagen; el resto se omite.
+        """
+        attachments = attachments.filtered(
+            lambda a: a.checksum and (a.mimetype or '').startswith('image/')
+        )
+        if not attachments:
+            return {}
+        by_checksum = {
+            rendition.checksum: rendition
+            for rendition in self.search([
+                ('checksum', 'in', list(set(attachments.mapped('checksum')))),
+                ('size', '=', size),
+            ])
+        }
+        vals_list = []
+        for attachment in attachments:
+            if attachment.checksum in by_checksum:
+                continue
+            vals = self._prepare_rendition_vals(attachment.raw, attachment.checksum, size)
+            if vals:
+                by_checksum[attachment.checksum] = None
+                vals_list.append(vals)
+        if vals_list:
+            try:
+                with self.env.cr.savepoint():
+                    created = self.create(vals_list)
+            except IntegrityError:
+                # Otro proceso ha generado las mismas versiones a la vez
+                created = self.search([
+                    ('checksum', 'in', [vals['checksum'] for vals in vals_list]),
+                    ('size', '=', size),
+                ])
+            by_checksum.update({rendition.checksum: rendition for rendition in created})
+        return {
+            attachment.id: by_checksum[attachment.checksum]
+            for attachment in attachments
+            if by_checksum.get(attachment.checksum)
+        }
@@ -0,0 +1,35 @@
+from odoo import api, models, tools
+from odoo.tools import frozendict
+
+
+class JewelrySettings(models.AbstractModel):
+    """Acceso cacheado a los parámetros de configuración de joyería.
+
+    Todos los módulos jewelry_* leen sus parámetros a través de este
+    servicio en lugar de llamar a `ir.config_parameter` en cada cómputo.
+    Los parámetros son globales (parámetros del sistema, iguales para todas
+    las compañías), así que la caché tiene una sola entrada. Escribir un
+    parámetro ya invalida el ormcache, así que guardar los ajustes la limpia.
+    """
+
+    _name = 'jewelry.settings'
+    _description = 'Jewelry Settings Service'
+
+    @api.model
+    def _get_jewelry_settings(self):
+        """Devuelve los parámetros de joyería, comunes a todas las compañías.
+
+        Returns:
+            frozendict con las claves blocking_days, default_pawn_margin y
+            default_daily_surcharge (porcentajes en escala 0-100)
+        """
+        return self._get_settings_cached()
+
+    @tools.ormcache()
+    def _get_settings_cached(self):
+        ICP = self.env['ir.config_parameter'].sudo()
+        return frozendict({
+            'blocking_days': int(ICP.get_param('jewelry.blocking_days', 14)),
+            'default_pawn_margin': float(ICP.get_param('jewelry.default_pawn_margin', 20.0)),
+            'default_daily_surcharge': float(ICP.get_param('jewelry.default_daily_surcharge', 0.5)),
+        })
@@ -1,6 +1,6 @@
 {
     'name': 'Jewelry Partner',
-    'version': '18.0.1.2.0',
+    'version': '18.0.1.4.0',
     'category': 'Sales',
     'summary': 'Extends contacts with ID document photos',
     'description': """
@@ -13,6 +13,8 @@
         - Default contact type: Particular (Individual)
         - Hidden fields: Job position, Website, Title, Language
         - Hidden "Sales & Purchase" tab for individuals
+        - Normalized, indexed DNI/NIE with control letter validation
+        - Daily merge of duplicate clients sharing a DNI/NIE
     """,
     'author': 'NarimERP',
     'website': 'https://github.com/yourusername/NarimERP',
@@ -20,6 +22,7 @@
     'depends': ['jewelry_base'],
     'data': [
         'security/ir.model.access.csv',
+        'data/cron_data.xml',
         'views/res_partner_views.xml',
     ],
     'installable': True,
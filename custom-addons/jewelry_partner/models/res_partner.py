@@ -1,4 +1,17 @@
-from odoo import fields, models
+import logging
+
+from odoo import api, fields, models
+from odoo.osv import expression
+from odoo.tools import split_every
+
+from ..tools import is_valid_document_number, normalize_document_number
+
+_logger = logging.getLogger(__name__)
+
+# Grupos de duplicados fusionados por ejecución del cron
+DEDUP_BATCH_SIZE = 200
+# El asistente de fusión de Odoo admite como máximo 3 contactos a la vez
+MERGE_MAX_PARTNERS = 3
 
 
 class ResPartner(models.Model):
@@ -22,3 +35,164 @@ class ResPartner(models.Model):
         max_width=1920,
         max_height=1920,
     )
+
+    document_number = fields.Char(
+        string='Document Number',
+        compute='_compute_document_number',
+        store=True,
+        index='btree_not_null',
+        help='DNI/NIE normalized from the Tax ID: uppercase, without separators',
+    )
+    document_valid = fields.Boolean(
+        string='Valid DNI/NIE',
+        compute='_compute_document_number',
+        store=True,
+        help='The document number is a DNI or NIE with a correct control letter',
+    )
+
+    document_merge_failed = fields.Boolean(
+        string='Duplicate Merge Failed',
+        copy=False,
+        help='The automatic merge of the clients sharing this DNI/NIE failed. '
+             'The group is skipped until this is unchecked after a manual review.',
+    )
+
+    @api.depends('vat')
+    def _compute_document_number(self):
+        for partner in self:
+            number = normalize_document_number(partner.vat)
+            partner.document_number = number
+            partner.document_valid = is_valid_document_number(number)
+
+    @api.model
+    def _find_by_document_number(self, value, limit=None):
+        """Particulares con el mismo DNI/NIE que `value` (búsqueda exacta por índice)."""
+        number = normalize_document_number(value)
+        if not number:
+            return self.browse()
+        return self.search([
+            ('document_number', '=', number),
+            ('is_company', '=', False),
+        ], limit=limit)
+
+    @api.model
+    def name_search(self, name='', args=None, operator='ilike', limit=100):
+        # Un DNI/NIE válido se busca por igualdad en el índice, sin ilike
+        number = normalize_document_number(name)
+        if operator in ('ilike', '=ilike', '=') and is_valid_document_number(number):
+            partners = self.search_fetch(
+                expression.AND([args or [], [('document_number', '=', number)]]),
+                ['display_name'],
+                limit=limit,
+            )
+            if partners:
+                return [(partner.id, partner.display_name) for partner in partners]
+        return super().name_search(name, args=args, operator=operator, limit=limit)
+
+    @api.onchange('vat')
+    def _onchange_vat_document_match(self):
+        """Avisa al dar de alta un cliente cuyo DNI/NIE ya existe."""
+        if self.is_company or not self.vat:
+            return
+        matches = self._find_by_document_number(self.vat, limit=3)
+        matches -= self._origin
+        if matches:
+            return {'warning': {
+                'title': 'Cliente ya registrado',
+                'message': 'Ya existe un cliente con este documento: %s. '
+                           'Selecciónelo en lugar de crear uno nuevo.'
+                           % ', '.join(matches.mapped('display_name')),
+            }}
+        number = normalize_document_number(self.vat)
+        # Solo para lo que parece un DNI/NIE: el pasaporte u otros documentos no se validan
+        if number and (number[0].isdigit() or number[0] in 'XYZ') and not is_valid_document_number(number):
+            return {'warning': {
+                'title': 'DNI/NIE no válido',
+                'message': 'La letra de control de %s no es correcta.' % number,
+            }}
+
+    @api.model
+    def _get_duplicate_document_groups(self, limit=None):
+        """Ids de particulares activos que comparten DNI/NIE válido, el más antiguo primero.
+
+        Solo entran contactos comerciales: el NIF se copia a las direcciones
+        hijas (entrega, facturación) y Odoo no fusiona un contacto con su padre.
+        Los grupos que ya fallaron se saltan para no ocupar el lote en cada
+        ejecución.
+        """
+        self.flush_model([
+            'document_number', 'document_valid', 'is_company', 'active', 'company_id', 'parent_id',
+            'document_merge_failed',
+        ])
+        self.env.cr.execute("""
+            SELECT array_agg(id ORDER BY id)
+              FROM res_partner
+             WHERE document_valid
+               AND active
+               AND NOT is_company
+               AND parent_id IS NULL
+          GROUP BY document_number, company_id
+            HAVING COUNT(*) > 1
+               AND NOT bool_or(COALESCE(document_merge_failed, FALSE))
+          ORDER BY MIN(id)
+             LIMIT %s
+        """, [limit])
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    @api.model
+    def _merge_duplicate_documents(self, batch_size=DEDUP_BATCH_SIZE, auto_commit=False):
+        """Fusiona los particulares duplicados por DNI/NIE en el más antiguo.
+
+        Solo se fusionan documentos con la letra de control correcta, para
+        no unir clientes distintos por un número mal tecleado. `_merge` se
+        llama sin `extra_checks` (exigiría el mismo email en todos), así que
+        la guarda de apuntes contables se aplica aquí: esos grupos no se
+        fusionan. Cada grupo se fusiona en un savepoint; si falla o tiene
+        apuntes, se registra, se marca con `document_merge_failed` para
+        revisarlo a mano y se sigue con el siguiente.
+
+        Returns:
+            (grupos fusionados, contactos eliminados)
+        """
+        Merge = self.env['base.partner.merge.automatic.wizard']
+        groups = self._get_duplicate_document_groups(limit=batch_size)
+        merged_groups = merged_partners = 0
+        for index, partner_ids in enumerate(groups):
+            destination = self.browse(partner_ids[0])
+            if self._has_journal_items(partner_ids[1:]):
+                # Guarda del núcleo: solo el contacto destino puede tener apuntes contables
+                _logger.warning(
+                    "Partners %s share a document number but have journal items: review manually",
+                    partner_ids,
+                )
+                self.browse(partner_ids).write({'document_merge_failed': True})
+            else:
+                try:
+                    with self.env.cr.savepoint():
+                        for duplicate_ids in split_every(MERGE_MAX_PARTNERS - 1, partner_ids[1:]):
+                            Merge._merge([destination.id, *duplicate_ids], destination, extra_checks=False)
+                    merged_groups += 1
+                    merged_partners += len(partner_ids) - 1
+                except Exception:
+                    _logger.exception("Could not merge partners %s sharing a document number", partner_ids)
+                    self.browse(partner_ids).write({'document_merge_failed': True})
+            if auto_commit:
+                self.env['ir.cron']._notify_progress(done=index + 1, remaining=len(groups) - index - 1)
+                self.env.cr.commit()
+        _logger.info("Duplicate clients merged: %d groups, %d contacts removed", merged_groups, merged_partners)
+        return merged_groups, merged_partners
+
+    @api.model
+    def _has_journal_items(self, partner_ids):
+        """Si alguno de los contactos tiene apuntes contables (con account instalado)."""
+        if 'account.move.line' not in self.env:
+            return False
+        return bool(self.env['account.move.line'].sudo().search_count(
+            [('partner_id', 'in', list(partner_ids))], limit=1,
+        ))
+
+    @api.model
+    def cron_merge_duplicate_documents(self):
+        """Cron job: fusiona los clientes duplicados por DNI/NIE."""
+        self._merge_duplicate_documents(auto_commit=True)
+        return True
@@ -0,0 +1 @@
+from .document_number import is_valid_document_number, normalize_document_number
@@ -0,0 +1,44 @@
+"""Normalización y validación del DNI/NIE español.
+
+El número se guarda tal como lo escribe el dependiente ("12.345.678-z",
+"x 1234567 l", "ES12345678Z"); para buscar y comparar se reduce a una forma
+canónica: mayúsculas, sin separadores, sin prefijo de país y con el DNI
+rellenado a 8 cifras.
+"""
+import re
+
+# Letra de control: posición = número % 23
+CONTROL_LETTERS = 'TRWAGMYFPDXBNJZSQVHLCKE'
+# Prefijo del NIE -> cifra que lo sustituye en el cálculo
+NIE_PREFIXES = {'X': '0', 'Y': '1', 'Z': '2'}
+
+SEPARATORS_RE = re.compile(r'[^0-9A-Z]')
+DNI_RE = re.compile(r'^(\d{1,8})([A-Z])$')
+NIE_RE = re.compile(r'^([XYZ])(\d{7})([A-Z])$')
+
+
+def normalize_document_number(value):
+    """Forma canónica de un número de documento, o False si está vacío."""
+    number = SEPARATORS_RE.sub('', (value or '').upper())
+    # NIF con prefijo de país (ES12345678Z): se guarda solo el documento
+    if number.startswith('ES') and is_valid_document_number(number[2:]):
+        number = number[2:]
+    match = DNI_RE.match(number)
+    if match:
+        number = match.group(1).zfill(8) + match.group(2)
+    return number or False
+
+
+def is_valid_document_number(number):
+    """Si `number` (ya normalizado) es un DNI o NIE con la letra correcta."""
+    number = number or ''
+    match = NIE_RE.match(number)
+    if match:
+        prefix, digits, letter = match.groups()
+        digits = NIE_PREFIXES[prefix] + digits
+    else:
+        match = DNI_RE.match(number)
+        if not match:
+            return False
+        digits, letter = match.groups()
+    return CONTROL_LETTERS[int(digits) % 23] == letter
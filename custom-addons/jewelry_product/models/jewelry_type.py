@@ -1,4 +1,6 @@
-from odoo import api, fields, models
+from odoo import api, fields, models, tools
+
+from ..tools import KeywordMatcher
 
 
 class JewelryType(models.Model):
@@ -45,44 +47,64 @@ class JewelryType(models.Model):
             return []
         return [kw.strip().lower() for kw in self.keywords.split(',') if kw.strip()]
 
-    @api.model
-    def infer_from_description(self, description):
-        """
-        Infer jewelry type from description using keyword matching.
+    @api.model_create_multi
+    def create(self, vals_list):
+        types = super().create(vals_list)
+        self._clear_matcher_cache()
+        return types
 
-        Args:
-            description: Text description to analyze
+    def write(self, vals):
+        res = super().write(vals)
+        if {'keywords', 'active', 'company_id', 'sequence', 'name'}.intersection(vals):
+            self._clear_matcher_cache()
+        return res
 
-        Returns:
-            jewelry.type record or empty recordset if no match
-        """
-        if not description:
-            return self.browse()
+    def unlink(self):
+        res = super().unlink()
+        self._clear_matcher_cache()
+        return res
+
+    @api.model
+    def _clear_matcher_cache(self):
+        self.env.registry.clear_cache()
 
-        description_lower = description.lower()
+    @tools.ormcache('company_id')
+    def _get_keyword_matcher(self, company_id):
+        """Matcher compilado con los tipos activos visibles para la compañía.
 
-        # Search all active types with keywords
-        types = self.search([
+        Se guarda en la caché del registro y solo se reconstruye cuando se
+        crea, modifica o archiva un tipo de joya.
+        """
+        types = self.sudo().search([
             ('keywords', '!=', False),
             ('active', '=', True),
             '|',
             ('company_id', '=', False),
-            ('company_id', '=', self.env.company.id),
+            ('company_id', '=', company_id),
         ])
+        return KeywordMatcher(
+            (jewelry_type.id, jewelry_type._get_keyword_list())
+            for jewelry_type in types
+        )
 
-        best_match = self.browse()
-        best_score = 0
+    @api.model
+    def infer_from_description(self, description):
+        """
+        Infer jewelry type from description using keyword matching.
 
-        for jewelry_type in types:
-            keywords = jewelry_type._get_keyword_list()
-            if not keywords:
-                continue
+        Uses the cached matcher of the current company, so it costs one
+        in-memory scan of the text and no SQL query.
 
-            # Count matching keywords (simple scoring)
-            score = sum(1 for kw in keywords if kw in description_lower)
+        Args:
+            description: Text description to analyze
 
-            if score > best_score:
-                best_score = score
-                best_match = jewelry_type
+        Returns:
+            jewelry.type record or empty recordset if no match
+        """
+        if not description:
+            return self.browse()
 
-        return best_match
+        # Score = tokens of the keywords found (accent, plural and elision
+        # insensitive, whole words only); ties go to the first type in order
+        type_id = self._get_keyword_matcher(self.env.company.id).best_match(description)
+        return self.browse(type_id) if type_id else self.browse()
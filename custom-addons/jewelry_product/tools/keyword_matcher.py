@@ -0,0 +1,135 @@
+"""Autómata Aho-Corasick para la inferencia del tipo de joya.
+
+Se construye una vez con las palabras clave de todos los tipos activos y
+después cada descripción se recorre una sola vez, sin importar cuántas
+palabras clave haya configuradas.
+
+El autómata trabaja sobre tokens normalizados, no sobre caracteres: las
+palabras clave y las descripciones pasan por la misma normalización (sin
+acentos, sin elisiones catalanas, plural y género reducidos), de modo que
+"Cadenas", "cadena d'or" y "CADÉNA" coinciden con la clave "cadena" pero
+"aro" ya no coincide dentro de "claro".
+"""
+import re
+import unicodedata
+from collections import deque
+
+# Elisión catalana/francesa: d'or, l'anell, s'ha...
+ELISION_RE = re.compile(r"\b[a-z]{1,2}['’´`]")
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def strip_accents(text):
+    """Quita tildes y diacríticos (á → a, ç → c, ñ → n)."""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def stem(token):
+    """Reducción ligera de plural y género para español y catalán.
+
+    cruces → cruz, collares → collar, anillos/anillo → anill,
+    cadenes/cadena → caden, relojes → reloj. No pretende obtener la raíz
+    lingüística, solo que las variantes de una palabra coincidan entre sí.
+    """
+    if len(token) > 4 and token.endswith('ces'):
+        token = token[:-3] + 'z'
+    if len(token) > 3 and token.endswith('s'):
+        token = token[:-1]
+    if len(token) > 3 and token[-1] in 'aeo':
+        token = token[:-1]
+    return token
+
+
+def tokenize(text):
+    """Normaliza un texto y lo divide en tokens reducidos."""
+    text = strip_accents((text or '').lower())
+    text = ELISION_RE.sub(' ', text)
+    return tuple(stem(token) for token in TOKEN_RE.findall(text))
+
+
+class KeywordMatcher:
+    """Matcher inmutable: palabras clave -> candidatos puntuados.
+
+    Cada palabra clave suma tantos puntos como tokens tiene, así una clave
+    compuesta ("alianza de boda") pesa más que una suelta ("boda").
+
+    Args:
+        entries: iterable de (candidate, keywords) en orden de prioridad;
+            ante empate de puntuación gana el primero
+    """
+
+    def __init__(self, entries):
+        # Trie de tokens: transiciones por nodo, salida (claves que terminan aquí) y enlace de fallo
+        self._goto = [{}]
+        self._output = [set()]
+        self._fail = [0]
+        self._weights = {}
+        self._priority = {}
+
+        keyword_ids = {}
+        for priority, (candidate, keywords) in enumerate(entries):
+            self._priority.setdefault(candidate, priority)
+            for keyword in keywords:
+                tokens = tokenize(keyword)
+                if not tokens:
+                    continue
+                keyword_id = keyword_ids.setdefault(tokens, len(keyword_ids))
+                # Variantes que se normalizan igual (aro/aros) cuentan una sola vez
+                self._weights.setdefault(keyword_id, {})[candidate] = len(tokens)
+                self._insert(tokens, keyword_id)
+        self._build_failure_links()
+
+    def _insert(self, tokens, keyword_id):
+        node = 0
+        for token in tokens:
+            next_node = self._goto[node].get(token)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][token] = next_node
+                self._goto.append({})
+                self._output.append(set())
+                self._fail.append(0)
+            node = next_node
+        self._output[node].add(keyword_id)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(token, 0)
+                self._output[child] |= self._output[self._fail[child]]
+        # Congelar las salidas: el matcher se comparte entre peticiones
+        self._output = [frozenset(output) for output in self._output]
+
+    def find_keywords(self, text):
+        """Ids de las palabras clave presentes en `text` (una sola pasada)."""
+        found = set()
+        node = 0
+        for token in tokenize(text):
+            while node and token not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(token, 0)
+            if self._output[node]:
+                found |= self._output[node]
+        return found
+
+    def scores(self, text):
+        """Puntuación por candidato: tokens de las palabras clave encontradas."""
+        scores = {}
+        for keyword_id in self.find_keywords(text):
+            for candidate, weight in self._weights[keyword_id].items():
+                scores[candidate] = scores.get(candidate, 0) + weight
+        return scores
+
+    def best_match(self, text):
+        """Candidato con mayor puntuación, o None si nada coincide."""
+        scores = self.scores(text)
+        if not scores:
+            return None
+        return max(scores, key=lambda candidate: (scores[candidate], -self._priority[candidate]))
@@ -1,6 +1,6 @@
 {
     'name': 'Jewelry: Client Purchases',
-    'version': '18.0.2.5.1',
+    'version': '18.0.2.20.0',
     'category': 'Jewelry',
     'summary': 'Gold and jewelry purchases from individuals with pawn support',
     'description': """
@@ -38,8 +38,12 @@
         'wizard/smelt_all_wizard_views.xml',
         'wizard/receive_all_wizard_views.xml',
         'wizard/recovery_wizard_views.xml',
+        'wizard/smelting_batch_builder_views.xml',
         'security/force_unlock_security.xml',
         'views/smelting_batch_views.xml',
+        'views/jewelry_job_views.xml',
+        'report/smelting_loss_report_views.xml',
+        'views/line_image_views.xml',
         'views/client_purchase_views.xml',
         'views/product_views.xml',
         'views/pos_session_views.xml',
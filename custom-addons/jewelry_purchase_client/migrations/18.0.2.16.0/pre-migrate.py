@@ -0,0 +1,4 @@
+def migrate(cr, version):
+    # El índice único global sobre default_code chocaba con los SKU de otras
+    # compañías y con "Duplicar" producto; el core ya indexa default_code
+    cr.execute("DROP INDEX IF EXISTS product_product_default_code_unique")
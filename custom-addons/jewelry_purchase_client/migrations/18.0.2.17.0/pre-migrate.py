@@ -0,0 +1,4 @@
+def migrate(cr, version):
+    # Duplicaban el índice parcial de next_transition_date, que es el que usa el cron
+    cr.execute("DROP INDEX IF EXISTS jewelry_client_purchase_open_blocking_idx")
+    cr.execute("DROP INDEX IF EXISTS jewelry_client_purchase_open_recovery_idx")
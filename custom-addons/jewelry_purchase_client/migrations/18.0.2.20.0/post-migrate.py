@@ -0,0 +1,7 @@
+from odoo import SUPERUSER_ID, api
+
+
+def migrate(cr, version):
+    # Los totales de fino pasan a mantenerse por deltas: rellenar los lotes existentes
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['jewelry.smelting.batch']._check_totals_drift(fix=True)
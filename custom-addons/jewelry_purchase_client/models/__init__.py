@@ -1,6 +1,12 @@
 from . import client_purchase
+from . import client_purchase_transition
+from . import client_purchase_surcharge
 from . import client_purchase_line
+from . import client_purchase_line_type_inference
+from . import client_purchase_indexes
+from . import jewelry_job
 from . import smelting_batch
+from . import material_quality
 from . import product
 from . import pos_session
 from . import res_partner
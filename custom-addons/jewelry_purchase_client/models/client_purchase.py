@@ -34,6 +34,7 @@ class ClientPurchaseOrder(models.Model):
         comodel_name='res.partner',
         string='Client',
         required=True,
+        index=True,
         tracking=True,
         domain="[('is_company', '=', False)]",
         help='Individual client selling gold/jewelry',
@@ -145,6 +146,7 @@ class ClientPurchaseOrder(models.Model):
         string='Sesión de Caja',
         readonly=True,
         copy=False,
+        index='btree_not_null',
         help='Sesión POS donde se registró el movimiento de caja',
     )
     pos_statement_line_id = fields.Many2one(
@@ -215,7 +217,7 @@ class ClientPurchaseOrder(models.Model):
     # =====================================================
     recovery_margin_percent = fields.Float(
         string='Margen Recuperación (%)',
-        default=0.10,
+        default=lambda self: self._default_recovery_margin_percent(),
         digits=(5, 2),
         help='Porcentaje sobre el precio de compra para calcular el precio de recuperación base',
     )
@@ -237,7 +239,7 @@ class ClientPurchaseOrder(models.Model):
     )
     daily_surcharge_percent = fields.Float(
         string='Recargo Diario (%)',
-        default=0.10,
+        default=lambda self: self._default_daily_surcharge_percent(),
         digits=(5, 3),
         help='Porcentaje diario sobre el precio de compra si recupera después del plazo',
     )
@@ -253,7 +255,8 @@ class ClientPurchaseOrder(models.Model):
     days_overdue = fields.Integer(
         string='Días Vencido',
         compute='_compute_days_overdue',
-        help='Días transcurridos después de la fecha límite',
+        store=True,
+        help='Días transcurridos después de la fecha límite. Actualizado a diario por el cron de recargos.',
     )
     current_surcharge = fields.Monetary(
         string='Recargo por Demora',
@@ -262,6 +265,12 @@ class ClientPurchaseOrder(models.Model):
         readonly=False,
         help='Recargo acumulado por demora. Editable para perdonar parcial o totalmente.',
     )
+    surcharge_manual = fields.Boolean(
+        string='Recargo Ajustado',
+        default=False,
+        copy=False,
+        help='El recargo se ha ajustado a mano y ya no se acumula automáticamente',
+    )
     total_recovery_amount = fields.Monetary(
         string='Total a Pagar',
         compute='_compute_total_recovery_amount',
@@ -294,31 +303,58 @@ class ClientPurchaseOrder(models.Model):
          'Reference must be unique per company!'),
     ]
 
+    def _split_stored_records(self):
+        """Separa los registros ya guardados de los nuevos (onchange).
+
+        Los guardados se agregan con una consulta agrupada para todo el
+        recordset; los nuevos solo existen en caché y se calculan en Python.
+        """
+        stored = self.browse([id_ for id_ in self._ids if isinstance(id_, int)])
+        return stored, self - stored
+
     @api.depends('line_ids.price')
     def _compute_amount_total(self):
-        for order in self:
+        stored, new = self._split_stored_records()
+        if stored:
+            totals = dict(self.env['jewelry.client.purchase.line']._read_group(
+                [('order_id', 'in', stored.ids)],
+                groupby=['order_id'],
+                aggregates=['price:sum'],
+            ))
+            for order in stored:
+                order.amount_total = totals.get(order, 0.0)
+        for order in new:
             order.amount_total = sum(order.line_ids.mapped('price'))
 
     @api.depends('line_ids.image_ids')
     def _compute_total_image_count(self):
-        for order in self:
+        stored, new = self._split_stored_records()
+        if stored:
+            self.env['jewelry.client.purchase.line'].flush_model(['order_id', 'image_ids'])
+            self.env.cr.execute("""
+                SELECT line.order_id, COUNT(rel.attachment_id)
+                  FROM jewelry_client_purchase_line line
+                  JOIN client_purchase_line_image_rel rel ON rel.line_id = line.id
+                 WHERE line.order_id IN %s
+              GROUP BY line.order_id
+            """, [tuple(stored.ids)])
+            counts = dict(self.env.cr.fetchall())
+            for order in stored:
+                order.total_image_count = counts.get(order.id, 0)
+        for order in new:
             order.total_image_count = sum(order.line_ids.mapped('image_count'))
 
     def _compute_blocking_days(self):
-        blocking_days = int(self.env['ir.config_parameter'].sudo().get_param(
-            'jewelry.blocking_days', default=14
-        ))
+        settings = self.env['jewelry.settings']._get_jewelry_settings()
         for order in self:
-            order.blocking_days = blocking_days
+            order.blocking_days = settings['blocking_days']
 
     @api.depends('date', 'state')
     def _compute_blocking_end_date(self):
-        blocking_days = int(self.env['ir.config_parameter'].sudo().get_param(
-            'jewelry.blocking_days', default=14
-        ))
+        settings = self.env['jewelry.settings']._get_jewelry_settings()
         for order in self:
             if order.date and order.state not in ('draft', 'cancelled'):
-                order.blocking_end_date = order.date + timedelta(days=blocking_days)
+                order.blocking_end_date = order.date + timedelta(days=settings['blocking_days'])
             else:
                 order.blocking_end_date = False
 
@@ -397,26 +433,29 @@ class ClientPurchaseOrder(models.Model):
             else:
                 order.days_overdue = 0
 
-    @api.depends('amount_total', 'daily_surcharge_percent', 'days_overdue', 'operation_type')
+    @api.depends('amount_total', 'daily_surcharge_percent', 'days_overdue', 'operation_type',
+                 'surcharge_manual')
     def _compute_current_surcharge(self):
         """Calcula el recargo por demora.
 
         Este campo es editable (readonly=False) para permitir perdonar
-        parcial o totalmente el recargo.
-        Solo recalcula si days_overdue > 0 y no hay valor previo guardado.
+        parcial o totalmente el recargo. Un ajuste manual marca
+        `surcharge_manual` y a partir de ahí se respeta el importe guardado.
         """
         for order in self:
             if order.operation_type != 'recoverable':
                 order.current_surcharge = 0
-            elif order.days_overdue <= 0:
-                # Sin demora, no hay recargo (pero respetamos si ya hay valor manual)
-                if not order.id:  # Solo en creación
-                    order.current_surcharge = 0
-            # Si hay días vencidos y no hay valor previo, calcular
-            elif order.days_overdue > 0 and not order.current_surcharge:
-                order.current_surcharge = (
-                    order.amount_total * order.daily_surcharge_percent * order.days_overdue
-                )
+            elif order.surcharge_manual:
+                order.current_surcharge = order.current_surcharge
+            else:
+                order.current_surcharge = order._get_computed_surcharge()
+
+    def _get_computed_surcharge(self):
+        """Recargo acumulado según el porcentaje diario y los días vencidos."""
+        self.ensure_one()
+        if self.operation_type != 'recoverable':
+            return 0.0
+        return self.amount_total * self.daily_surcharge_percent * self.days_overdue
 
     @api.depends('recovery_base_amount', 'current_surcharge')
     def _compute_total_recovery_amount(self):
@@ -433,6 +472,18 @@ class ClientPurchaseOrder(models.Model):
                 order.state in ('blocked', 'recoverable', 'available')
             )
 
+    @api.model
+    def _default_recovery_margin_percent(self):
+        """Margen por defecto de los ajustes (en %) como fracción."""
+        settings = self.env['jewelry.settings']._get_jewelry_settings()
+        return settings['default_pawn_margin'] / 100.0
+
+    @api.model
+    def _default_daily_surcharge_percent(self):
+        """Recargo diario por defecto de los ajustes (en %) como fracción."""
+        settings = self.env['jewelry.settings']._get_jewelry_settings()
+        return settings['default_daily_surcharge'] / 100.0
+
     @api.model
     def _get_default_warehouse(self):
         """Obtiene el almacén por defecto del usuario o el primero de la compañía."""
@@ -456,6 +507,21 @@ class ClientPurchaseOrder(models.Model):
                 ) or 'New'
         return super().create(vals_list)
 
+    def write(self, vals):
+        if 'current_surcharge' in vals and 'surcharge_manual' not in vals:
+            # En borrador el recargo lo recalcula el formulario. Fuera de
+            # borrador el formulario y el asistente de recuperación reenvían
+            # el recargo aunque no se toque: solo es un ajuste manual si
+            # difiere del calculado
+            adjusted = self.filtered(lambda o: o.state != 'draft' and o.currency_id.compare_amounts(
+                vals['current_surcharge'] or 0.0, o._get_computed_surcharge(),
+            ))
+            super(ClientPurchaseOrder, self - adjusted).write(vals)
+            return super(ClientPurchaseOrder, adjusted).write(
+                dict(vals, surcharge_manual=True)
+            )
+        return super().write(vals)
+
     # =====================================================
     # POS Integration Methods
     # =====================================================
@@ -569,6 +635,8 @@ class ClientPurchaseOrder(models.Model):
                 order._create_pos_cash_out()
 
             order.write({'state': 'blocked'})
+        # Fijar la numeración de líneas: base estable para los SKU
+        self.line_ids._assign_line_numbers()
         return True
 
     def action_mark_available(self):
@@ -698,76 +766,6 @@ class ClientPurchaseOrder(models.Model):
             'context': {'default_purchase_id': self.id},
         }
 
-    def cron_check_blocking_period(self):
-        """Cron job: procesa transiciones automáticas de estado.
-
-        Transiciones:
-        1. Compras normales: blocked → available (cuando bloqueo termina)
-        2. Empeños en bloqueo: blocked → recoverable (cuando bloqueo termina y aún en plazo)
-        3. Empeños recuperables: recoverable → available (cuando plazo de recuperación vence)
-        """
-        today = fields.Date.today()
-
-        # 1. Compras normales: blocked → available
-        blocked_purchases = self.search([
-            ('state', '=', 'blocked'),
-            ('operation_type', '=', 'purchase'),
-            ('blocking_end_date', '<=', today),
-        ])
-        if blocked_purchases:
-            blocked_purchases.write({'state': 'available'})
-            for order in blocked_purchases:
-                order.message_post(
-                    body='Período de bloqueo finalizado. Artículos disponibles para procesar.',
-                    message_type='notification',
-                )
-
-        # 2. Empeños: blocked → recoverable (bloqueo terminó pero plazo aún vigente)
-        blocked_pawns = self.search([
-            ('state', '=', 'blocked'),
-            ('operation_type', '=', 'recoverable'),
-            ('blocking_end_date', '<=', today),
-            ('recovery_deadline', '>', today),
-        ])
-        if blocked_pawns:
-            blocked_pawns.write({'state': 'recoverable'})
-            for order in blocked_pawns:
-                order.message_post(
-                    body=f'Período de bloqueo finalizado. Cliente puede recuperar hasta {order.recovery_deadline}.',
-                    message_type='notification',
-                )
-
-        # 3. Empeños: blocked → available (bloqueo terminó y plazo también venció)
-        blocked_pawns_expired = self.search([
-            ('state', '=', 'blocked'),
-            ('operation_type', '=', 'recoverable'),
-            ('blocking_end_date', '<=', today),
-            ('recovery_deadline', '<=', today),
-        ])
-        if blocked_pawns_expired:
-            blocked_pawns_expired.write({'state': 'available'})
-            for order in blocked_pawns_expired:
-                order.message_post(
-                    body='Período de bloqueo y plazo de recuperación finalizados. Artículos disponibles para procesar.',
-                    message_type='notification',
-                )
-
-        # 4. Empeños recuperables: recoverable → available (plazo venció)
-        expired_pawns = self.search([
-            ('state', '=', 'recoverable'),
-            ('operation_type', '=', 'recoverable'),
-            ('recovery_deadline', '<=', today),
-        ])
-        if expired_pawns:
-            expired_pawns.write({'state': 'available'})
-            for order in expired_pawns:
-                order.message_post(
-                    body='Plazo de recuperación vencido. Artículos disponibles para procesar.',
-                    message_type='notification',
-                )
-
-        return True
-
     def action_open_recovery_wizard(self):
         """Abre el wizard de recuperación para empeños."""
         self.ensure_one()
@@ -0,0 +1,135 @@
+import json
+import logging
+
+from odoo import api, fields, models
+from odoo.tools import SQL
+from odoo.tools.sql import create_index, make_index_name
+
+from .client_purchase_transition import TRANSITION_INDEX
+
+_logger = logging.getLogger(__name__)
+
+# Índices compuestos: nombre -> (tabla, columnas, condición del índice parcial).
+# Las transiciones del cron usan el índice parcial de `next_transition_date`
+# (client_purchase_transition.py).
+POLICE_REPORT_INDEX = 'jewelry_client_purchase_date_warehouse_state_idx'
+PURCHASE_INDEXES = {
+    # Informe policial: rango de fechas, tienda y estado
+    POLICE_REPORT_INDEX: (
+        'jewelry_client_purchase', ['date', 'warehouse_id', 'state'], None,
+    ),
+}
+LINE_INDEXES = {
+    # Líneas de una orden en un estado: pendientes, en fundición...
+    'jewelry_client_purchase_line_order_state_idx': (
+        'jewelry_client_purchase_line', ['order_id', 'line_state'], None,
+    ),
+}
+
+
+class ClientPurchaseOrder(models.Model):
+    _inherit = 'jewelry.client.purchase'
+
+    def init(self):
+        super().init()
+        for name, (table, columns, where) in PURCHASE_INDEXES.items():
+            create_index(self.env.cr, name, table, columns, where=where)
+
+    @api.model
+    def _get_domain_query(self, model_name, domain):
+        """SELECT de ids que ejecuta el ORM para `domain`."""
+        Model = self.env[model_name]
+        return Model._search(domain).select(SQL.identifier(Model._table, 'id'))
+
+    @api.model
+    def _get_hot_queries(self):
+        """Consultas frecuentes del flujo de compras, tal como las ejecuta el código.
+
+        Otros módulos añaden las suyas (el informe policial, por ejemplo).
+
+        Returns:
+            dict {nombre: (SQL, nombres de los índices que debe usar el plan)}
+        """
+        today = fields.Date.context_today(self)
+        warehouse_id = self.env['stock.warehouse'].search([], limit=1).id
+        line_indexes = (
+            'jewelry_client_purchase_line_order_state_idx',
+            make_index_name('jewelry_client_purchase_line', 'order_id'),
+        )
+        return {
+            # Cron de transiciones: reparto por tienda y bloque con SKIP LOCKED
+            'transition_shards': (
+                self._get_domain_query('jewelry.client.purchase', self._get_due_transitions_domain(today)),
+                (TRANSITION_INDEX,),
+            ),
+            'transition_chunk': (
+                self._get_transition_chunk_query(warehouse_id, today, 0, 500),
+                (TRANSITION_INDEX,),
+            ),
+            # Líneas pendientes de una orden
+            'order_pending_lines': (
+                self._get_domain_query(
+                    'jewelry.client.purchase.line', [('order_id', '=', 0), ('line_state', '=', 'pending')],
+                ),
+                line_indexes,
+            ),
+            # Botones inteligentes de la sesión de caja y del cliente
+            'pos_session_orders': (
+                self._get_domain_query('jewelry.client.purchase', [('pos_session_id', '=', 0)]),
+                (make_index_name(self._table, 'pos_session_id'),),
+            ),
+            'partner_orders': (
+                self._get_domain_query('jewelry.client.purchase', [('partner_id', 'in', [0])]),
+                (make_index_name(self._table, 'partner_id'),),
+            ),
+        }
+
+    @api.model
+    def _explain_hot_queries(self):
+        """Comprueba con EXPLAIN que el planificador elige el índice previsto.
+
+        Se usa el plan real (sin desactivar escaneos), así que el resultado
+        depende de las estadísticas de la tabla: con pocos datos o sin
+        ANALYZE el planificador puede preferir leer la tabla entera. No basta
+        con que no haya Seq Scan: un recorrido de la clave primaria con
+        filtro también lo evita y sería igual de lento.
+
+        Returns:
+            dict {nombre: índices usados por el plan} de las consultas que no
+            usan ninguno de sus índices previstos; vacío si todas lo hacen
+        """
+        cr = self.env.cr
+        self.env.flush_all()
+        missing = {}
+        for name, (query, expected) in self._get_hot_queries().items():
+            cr.execute(SQL("EXPLAIN (FORMAT JSON) %s", query))
+            plan = cr.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            used = self._get_plan_indexes(plan[0]['Plan'])
+            if not set(expected) & set(used):
+                missing[name] = used
+                _logger.warning(
+                    "Hot query %s does not use %s (plan indexes: %s)",
+                    name, ' or '.join(expected), ', '.join(used) or 'none',
+                )
+        return missing
+
+    @api.model
+    def _get_plan_indexes(self, node):
+        """Índices leídos en un nodo del plan y sus hijos."""
+        indexes = []
+        if node.get('Index Name'):
+            indexes.append(node['Index Name'])
+        for child in node.get('Plans', []):
+            indexes.extend(self._get_plan_indexes(child))
+        return indexes
+
+
+class ClientPurchaseOrderLine(models.Model):
+    _inherit = 'jewelry.client.purchase.line'
+
+    def init(self):
+        super().init()
+        for name, (table, columns, where) in LINE_INDEXES.items():
+            create_index(self.env.cr, name, table, columns, where=where)
@@ -3,6 +3,9 @@ from markupsafe import Markup
 from odoo import api, fields, models
 from odoo.exceptions import UserError
 
+# Campos de la línea que alimentan los totales del lote de fundición
+BATCH_TOTAL_FIELDS = {'smelting_batch_id', 'weight', 'price', 'quality_id'}
+
 
 class ClientPurchaseOrderLine(models.Model):
     _name = 'jewelry.client.purchase.line'
@@ -20,6 +23,12 @@ class ClientPurchaseOrderLine(models.Model):
         string='Sequence',
         default=10,
     )
+    line_number = fields.Integer(
+        string='Line Number',
+        readonly=True,
+        copy=False,
+        help='Stable position of the line in the order, assigned on confirmation. Used to build the SKU.',
+    )
     description = fields.Text(
         string='Description',
         required=True,
@@ -141,7 +150,19 @@ class ClientPurchaseOrderLine(models.Model):
 
     @api.depends('image_ids')
     def _compute_image_count(self):
-        for line in self:
+        stored = self.browse([id_ for id_ in self._ids if isinstance(id_, int)])
+        if stored:
+            self.flush_model(['image_ids'])
+            self.env.cr.execute("""
+                SELECT line_id, COUNT(attachment_id)
+                  FROM client_purchase_line_image_rel
+                 WHERE line_id IN %s
+              GROUP BY line_id
+            """, [tuple(stored.ids)])
+            counts = dict(self.env.cr.fetchall())
+            for line in stored:
+                line.image_count = counts.get(line.id, 0)
+        for line in self - stored:
             line.image_count = len(line.image_ids)
 
     @api.depends('image_ids')
@@ -152,12 +173,13 @@ class ClientPurchaseOrderLine(models.Model):
                 continue
             html_parts = ['<div class="d-flex flex-wrap gap-2">']
             for attachment in line.image_ids:
-                # Use web/content for attachments with access_token for security
-                url = f'/web/image/{attachment.id}?access_token={attachment.access_token}' \
+                # Miniatura generada en servidor; la imagen original solo se carga al hacer clic
+                full_url = f'/web/image/{attachment.id}?access_token={attachment.access_token}' \
                     if attachment.access_token else f'/web/image/{attachment.id}'
+                thumb_url = f'/jewelry/image/{attachment.id}/small?unique={attachment.checksum or ""}'
                 html_parts.append(
-                    f'<a href="{url}" target="_blank">'
-                    f'<img src="{url}" '
+                    f'<a href="{full_url}" target="_blank">'
+                    f'<img src="{thumb_url}" '
                     f'style="max-height:120px;max-width:150px;object-fit:cover;'
                     f'border:1px solid #dee2e6;border-radius:8px;" '
                     f'title="{attachment.name}" loading="lazy"/>'
@@ -166,6 +188,47 @@ class ClientPurchaseOrderLine(models.Model):
             html_parts.append('</div>')
             line.image_preview = Markup(''.join(html_parts))
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        if any('image_ids' in vals for vals in vals_list):
+            lines._generate_image_renditions()
+        if any(vals.get('smelting_batch_id') for vals in vals_list):
+            Batch = self.env['jewelry.smelting.batch']
+            Batch._apply_line_deltas({}, Batch._get_line_aggregates(lines.ids))
+        return lines
+
+    def write(self, vals):
+        track_batch = bool(BATCH_TOTAL_FIELDS.intersection(vals))
+        if track_batch:
+            Batch = self.env['jewelry.smelting.batch']
+            before = Batch._get_line_aggregates(self.ids)
+        res = super().write(vals)
+        if track_batch:
+            Batch._apply_line_deltas(before, Batch._get_line_aggregates(self.ids))
+        if 'image_ids' in vals:
+            self._generate_image_renditions()
+        return res
+
+    def unlink(self):
+        Batch = self.env['jewelry.smelting.batch']
+        before = Batch._get_line_aggregates(self.ids)
+        res = super().unlink()
+        Batch._apply_line_deltas(before, {})
+        return res
+
+    def _generate_image_renditions(self):
+        """Genera las miniaturas de las fotos al subirlas."""
+        Rendition = self.env['jewelry.image.rendition'].sudo()
+        for size in ('small', 'medium'):
+            Rendition._get_renditions(self.image_ids, size)
+        # El informe policial solo usa la primera foto de cada línea
+        Rendition._get_renditions(self._get_report_image_attachments(), 'report')
+
+    def _get_report_image_attachments(self):
+        """Primera foto de cada línea: la que se imprime en los informes."""
+        return self.env['ir.attachment'].concat(*(line.image_ids[:1] for line in self))
+
     @api.onchange('quality_id')
     def _onchange_quality_id(self):
         """Auto-fill description with quality name if empty."""
@@ -189,6 +252,10 @@ class ClientPurchaseOrderLine(models.Model):
             'name': f'Photos - {self.description or "Item"}',
             'res_model': 'ir.attachment',
             'view_mode': 'kanban,form',
+            'views': [
+                (self.env.ref('jewelry_purchase_client.jewelry_line_image_view_kanban').id, 'kanban'),
+                (False, 'form'),
+            ],
             'domain': [('id', 'in', self.image_ids.ids)],
             'context': {
                 'default_res_model': self._name,
@@ -250,18 +317,50 @@ class ClientPurchaseOrderLine(models.Model):
         if all(line.line_state != 'pending' for line in order.line_ids):
             order.action_process()
 
-    def _get_line_number(self):
-        """Get the line position within the order (1-based)."""
-        self.ensure_one()
-        lines = self.order_id.line_ids.sorted(key=lambda l: (l.sequence, l.id))
-        for idx, line in enumerate(lines, start=1):
-            if line.id == self.id:
-                return idx
-        return 1
+    def _assign_line_numbers(self):
+        """Assign stable line numbers to the lines that do not have one yet.
+
+        Numbers follow the (sequence, id) order within each order and
+        continue after the highest number already assigned, so existing
+        numbers (and the SKUs built from them) never change.
+        """
+        order_ids = tuple(set(self.filtered(lambda l: not l.line_number).order_id.ids))
+        if not order_ids:
+            return
+        self.flush_model(['order_id', 'sequence', 'line_number'])
+        self.env.cr.execute("""
+            WITH numbered AS (
+                SELECT line.id,
+                       COALESCE(MAX(line.line_number) OVER (PARTITION BY line.order_id), 0)
+                       + ROW_NUMBER() OVER (
+                           PARTITION BY line.order_id, COALESCE(line.line_number, 0) = 0
+                           ORDER BY line.sequence, line.id
+                       ) AS number,
+                       COALESCE(line.line_number, 0) = 0 AS missing
+                  FROM jewelry_client_purchase_line line
+                 WHERE line.order_id IN %s
+            )
+            UPDATE jewelry_client_purchase_line line
+               SET line_number = numbered.number
+              FROM numbered
+             WHERE line.id = numbered.id
+               AND numbered.missing
+        """, [order_ids])
+        self.invalidate_model(['line_number'])
+
+    def _allocate_skus(self):
+        """Allocate SKUs for the whole recordset in one pass.
+
+        Returns:
+            dict {line_id: sku} with SKUs in the form <order reference>-<line number>
+        """
+        self._assign_line_numbers()
+        return {
+            line.id: f"{line.order_id.name or ''}-{line.line_number}"
+            for line in self
+        }
 
     def _generate_sku(self):
         """Generate SKU based on purchase reference and line number."""
         self.ensure_one()
-        order_ref = self.order_id.name or ''
-        line_num = self._get_line_number()
-        return f"{order_ref}-{line_num}"
+        return self._allocate_skus()[self.id]
@@ -0,0 +1,199 @@
+import logging
+from collections import Counter, defaultdict
+
+from odoo import api, models
+
+from odoo.addons.jewelry_product.tools import tokenize
+
+_logger = logging.getLogger(__name__)
+
+# Líneas por bloque del cron de clasificación
+TYPE_BACKFILL_CHUNK_SIZE = 2000
+# Punto de control del cron: último id de línea procesado
+TYPE_BACKFILL_CHECKPOINT = 'jewelry_purchase_client.type_backfill_last_id'
+
+
+class ClientPurchaseOrderLine(models.Model):
+    _inherit = 'jewelry.client.purchase.line'
+
+    @api.model
+    def _infer_jewelry_types(self, rows):
+        """Clasifica en bloque filas (id, descripción, compañía).
+
+        Usa el matcher cacheado de cada compañía y escribe los resultados
+        agrupados por tipo: una escritura por tipo de joya.
+
+        Returns:
+            (dict {type_id: nº líneas clasificadas}, lista de ids sin tipo)
+        """
+        JewelryType = self.env['jewelry.type']
+        ids_by_type = defaultdict(list)
+        unmatched = []
+        for line_id, description, company_id in rows:
+            type_id = JewelryType._get_keyword_matcher(company_id).best_match(description)
+            if type_id:
+                ids_by_type[type_id].append(line_id)
+            else:
+                unmatched.append(line_id)
+        for type_id, line_ids in ids_by_type.items():
+            self.browse(line_ids).write({'jewelry_type_id': type_id})
+        return {type_id: len(line_ids) for type_id, line_ids in ids_by_type.items()}, unmatched
+
+    @api.model
+    def _count_untyped_lines(self, after_id):
+        self.flush_model(['description', 'jewelry_type_id'])
+        self.env.cr.execute("""
+            SELECT COUNT(*)
+              FROM jewelry_client_purchase_line
+             WHERE jewelry_type_id IS NULL
+               AND description IS NOT NULL
+               AND id > %s
+        """, [after_id])
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def _fetch_untyped_lines(self, after_id, limit):
+        self.flush_model(['description', 'jewelry_type_id', 'company_id'])
+        self.env.cr.execute("""
+            SELECT id, description, company_id
+              FROM jewelry_client_purchase_line
+             WHERE jewelry_type_id IS NULL
+               AND description IS NOT NULL
+               AND id > %s
+          ORDER BY id
+             LIMIT %s
+        """, [after_id, limit])
+        return self.env.cr.fetchall()
+
+    @api.model
+    def _backfill_jewelry_types(self, chunk_size=TYPE_BACKFILL_CHUNK_SIZE, auto_commit=False, max_chunks=None):
+        """Clasifica por bloques las líneas históricas sin tipo de joya.
+
+        El último id procesado se guarda como punto de control al terminar
+        la ejecución, no tras cada bloque: escribir un parámetro del sistema
+        vacía el ormcache de todos los workers, y con él el matcher de tipos
+        que este proceso reutiliza. Si la ejecución se interrumpe no se
+        pierde trabajo: las líneas ya clasificadas dejan de estar sin tipo y
+        solo se vuelven a leer las que no tuvieron coincidencia.
+
+        El punto de control es una marca de nivel: cada ejecución solo lee
+        las líneas nuevas. Las que no tuvieron coincidencia se reintentan
+        cuando cambian las palabras clave, que lo devuelven a cero (ver
+        `jewelry.type`).
+
+        Returns:
+            dict de estadísticas, ver `_get_type_coverage_stats`
+        """
+        ICP = self.env['ir.config_parameter'].sudo()
+        last_id = int(ICP.get_param(TYPE_BACKFILL_CHECKPOINT, 0))
+        matched = Counter()
+        unmatched_count = 0
+        chunks = 0
+        remaining = self._count_untyped_lines(last_id) if auto_commit else 0
+        while max_chunks is None or chunks < max_chunks:
+            rows = self._fetch_untyped_lines(last_id, chunk_size)
+            if not rows:
+                break
+            counts, unmatched = self._infer_jewelry_types(rows)
+            matched.update(counts)
+            unmatched_count += len(unmatched)
+            last_id = rows[-1][0]
+            chunks += 1
+            if auto_commit:
+                remaining = max(remaining - len(rows), 0)
+                self.env['ir.cron']._notify_progress(done=sum(matched.values()) + unmatched_count, remaining=remaining)
+                self.env.cr.commit()
+            self.env.invalidate_all()
+        ICP.set_param(TYPE_BACKFILL_CHECKPOINT, last_id)
+
+        stats = self._get_type_coverage_stats()
+        stats['matched_this_run'] = dict(matched)
+        stats['unmatched_this_run'] = unmatched_count
+        _logger.info(
+            "Jewelry type backfill: %d lines classified, %d without match. Coverage %.1f%% (%d/%d)",
+            sum(matched.values()), unmatched_count,
+            stats['coverage'], stats['typed'], stats['total'],
+        )
+        if stats['unmatched_words']:
+            _logger.info(
+                "Most frequent words in unclassified lines: %s",
+                ', '.join(f'{word} ({count})' for word, count in stats['unmatched_words']),
+            )
+        return stats
+
+    @api.model
+    def _get_type_coverage_stats(self, top_words=20):
+        """Cobertura de la clasificación, para ajustar las palabras clave.
+
+        Todo se agrega en SQL sobre las líneas sin tipo: la memoria no
+        depende del número de líneas. Las palabras más frecuentes se cuentan
+        en bruto en la base de datos y las primeras se reducen después a los
+        tokens normalizados del matcher.
+
+        Returns:
+            dict con total, typed, coverage (%), by_type {nombre: nº líneas} y
+            unmatched_words: tokens normalizados más frecuentes en las líneas sin tipo
+        """
+        self.flush_model(['jewelry_type_id', 'description'])
+        groups = self._read_group(
+            [('description', '!=', False)],
+            groupby=['jewelry_type_id'],
+            aggregates=['__count'],
+        )
+        by_type = {jewelry_type.display_name: count for jewelry_type, count in groups if jewelry_type}
+        total = sum(count for __, count in groups)
+        typed = sum(count for jewelry_type, count in groups if jewelry_type)
+
+        # Margen sobre top_words: varias palabras en bruto dan el mismo token
+        self.env.cr.execute("""
+            SELECT word, COUNT(*)
+              FROM jewelry_client_purchase_line l,
+                   regexp_split_to_table(lower(l.description), '[^[:alnum:]]+') AS word
+             WHERE l.jewelry_type_id IS NULL
+               AND l.description IS NOT NULL
+               AND length(word) > 3
+          GROUP BY word
+          ORDER BY COUNT(*) DESC, word
+             LIMIT %s
+        """, [top_words * 5])
+        words = Counter()
+        for word, count in self.env.cr.fetchall():
+            # Mismos tokens normalizados que el matcher: listos para usar como clave
+            for token in tokenize(word):
+                if len(token) > 3:
+                    words[token] += count
+
+        return {
+            'total': total,
+            'typed': typed,
+            'coverage': 100.0 * typed / total if total else 100.0,
+            'by_type': by_type,
+            'unmatched_words': words.most_common(top_words),
+        }
+
+    @api.model
+    def cron_backfill_jewelry_types(self):
+        """Cron job: clasifica las líneas sin tipo de joya."""
+        self._backfill_jewelry_types(auto_commit=True)
+        return True
+
+
+class JewelryType(models.Model):
+    _inherit = 'jewelry.type'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        types = super().create(vals_list)
+        self._reset_type_backfill()
+        return types
+
+    def write(self, vals):
+        res = super().write(vals)
+        if {'keywords', 'active', 'company_id'}.intersection(vals):
+            self._reset_type_backfill()
+        return res
+
+    @api.model
+    def _reset_type_backfill(self):
+        """Con palabras clave nuevas el cron vuelve a recorrer las líneas sin tipo."""
+        self.env['ir.config_parameter'].sudo().set_param(TYPE_BACKFILL_CHECKPOINT, 0)
@@ -0,0 +1,61 @@
+import logging
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+# Recargo acumulado: importe * % diario * días vencidos, redondeado a la moneda.
+# Los recargos ajustados a mano (surcharge_manual) se conservan.
+SURCHARGE_SQL = """
+    CASE WHEN p.surcharge_manual THEN p.current_surcharge
+         ELSE ROUND(
+             COALESCE(p.amount_total, 0) * COALESCE(p.daily_surcharge_percent, 0)
+             * (%(today)s - p.recovery_deadline),
+             c.decimal_places)
+    END
+"""
+
+
+class ClientPurchaseOrder(models.Model):
+    _inherit = 'jewelry.client.purchase'
+
+    @api.model
+    def _accrue_pawn_surcharges(self, today=None):
+        """Actualiza días vencidos y recargo de todos los empeños vencidos.
+
+        Una única sentencia UPDATE sobre los empeños que aún pueden
+        recuperarse (blocked, recoverable, available) con la fecha límite
+        superada. Solo se tocan las filas cuyo número de días ha cambiado,
+        de modo que relanzar el proceso el mismo día no escribe nada.
+
+        Returns:
+            Número de empeños actualizados
+        """
+        today = today or fields.Date.today()
+        self.flush_model([
+            'state', 'operation_type', 'recovery_deadline', 'amount_total',
+            'daily_surcharge_percent', 'recovery_base_amount', 'current_surcharge',
+            'surcharge_manual', 'days_overdue', 'currency_id',
+        ])
+        self.env.cr.execute(f"""
+            UPDATE jewelry_client_purchase p
+               SET days_overdue = %(today)s - p.recovery_deadline,
+                   current_surcharge = {SURCHARGE_SQL},
+                   total_recovery_amount = COALESCE(p.recovery_base_amount, 0) + {SURCHARGE_SQL}
+              FROM res_currency c
+             WHERE c.id = p.currency_id
+               AND p.operation_type = 'recoverable'
+               AND p.state IN ('blocked', 'recoverable', 'available')
+               AND p.recovery_deadline < %(today)s
+               AND p.days_overdue IS DISTINCT FROM %(today)s - p.recovery_deadline
+         RETURNING p.id
+        """, {'today': today})
+        updated = len(self.env.cr.fetchall())
+        self.invalidate_model(['days_overdue', 'current_surcharge', 'total_recovery_amount'])
+        _logger.info("Recargos de empeños actualizados: %d", updated)
+        return updated
+
+    def cron_accrue_pawn_surcharge(self):
+        """Cron job: acumula el recargo diario de los empeños vencidos."""
+        self._accrue_pawn_surcharges()
+        return True
@@ -0,0 +1,349 @@
+import logging
+import time
+from collections import defaultdict
+
+from odoo import api, fields, models
+from odoo.tools import SQL
+from odoo.tools.sql import create_index
+
+_logger = logging.getLogger(__name__)
+
+# Órdenes por bloque: cada bloque se confirma por separado para liberar locks
+TRANSITION_CHUNK_SIZE = 500
+
+# Número de workers del cron de transiciones (un registro de cron por worker).
+# Debe coincidir con `max_cron_threads` de odoo.conf: con menos hilos los
+# workers se ejecutan uno detrás de otro y no se reparten las tiendas
+TRANSITION_WORKERS_PARAM = 'jewelry.transition_workers'
+TRANSITION_WORKERS_DEFAULT = 2
+TRANSITION_CRON_XMLID = 'cron_check_blocking_period'
+
+# Índice parcial de las órdenes abiertas que recorre el cron
+TRANSITION_INDEX = 'jewelry_client_purchase_next_transition_idx'
+
+# Transiciones automáticas: tipo -> (estado destino, mensaje en chatter)
+TRANSITIONS = {
+    'purchase_available': (
+        'available',
+        'Período de bloqueo finalizado. Artículos disponibles para procesar.',
+    ),
+    'pawn_recoverable': (
+        'recoverable',
+        'Período de bloqueo finalizado. Cliente puede recuperar hasta {recovery_deadline}.',
+    ),
+    'pawn_expired': (
+        'available',
+        'Período de bloqueo y plazo de recuperación finalizados. Artículos disponibles para procesar.',
+    ),
+    'recovery_expired': (
+        'available',
+        'Plazo de recuperación vencido. Artículos disponibles para procesar.',
+    ),
+}
+
+
+class ClientPurchaseOrder(models.Model):
+    _inherit = 'jewelry.client.purchase'
+
+    next_transition_date = fields.Date(
+        string='Próxima Transición',
+        compute='_compute_next_transition',
+        store=True,
+        help='Fecha a partir de la cual el cron cambiará automáticamente el estado',
+    )
+    next_transition_kind = fields.Selection(
+        selection=[
+            ('purchase_available', 'Fin de bloqueo (compra)'),
+            ('pawn_recoverable', 'Fin de bloqueo (empeño en plazo)'),
+            ('pawn_expired', 'Fin de bloqueo (empeño vencido)'),
+            ('recovery_expired', 'Vencimiento de recuperación'),
+        ],
+        string='Tipo de Transición',
+        compute='_compute_next_transition',
+        store=True,
+    )
+
+    def init(self):
+        super().init()
+        # Índice parcial: solo las órdenes abiertas entran en el escaneo diario
+        create_index(
+            self.env.cr,
+            TRANSITION_INDEX,
+            self._table,
+            ['next_transition_date'],
+            where="state IN ('blocked', 'recoverable')",
+        )
+
+    @api.depends('state', 'operation_type', 'blocking_end_date', 'recovery_deadline')
+    def _compute_next_transition(self):
+        """Calcula la próxima transición automática prevista.
+
+        Las órdenes procesadas, recuperadas o canceladas quedan sin fecha
+        y por tanto fuera del índice parcial y del cron.
+        """
+        for order in self:
+            date, kind = False, False
+            if order.state == 'blocked' and order.blocking_end_date:
+                date = order.blocking_end_date
+                if order.operation_type == 'purchase':
+                    kind = 'purchase_available'
+                elif order.recovery_deadline and order.recovery_deadline > date:
+                    kind = 'pawn_recoverable'
+                elif order.recovery_deadline:
+                    kind = 'pawn_expired'
+                else:
+                    date = False
+            elif (order.state == 'recoverable' and
+                    order.operation_type == 'recoverable' and
+                    order.recovery_deadline):
+                date = order.recovery_deadline
+                kind = 'recovery_expired'
+            order.next_transition_date = date
+            order.next_transition_kind = kind
+
+    def _get_due_transition(self, today):
+        """Devuelve el tipo de transición automática pendiente a fecha `today`.
+
+        Transiciones:
+        1. Compras normales: blocked → available (cuando bloqueo termina)
+        2. Empeños en bloqueo: blocked → recoverable (bloqueo terminó y aún en plazo)
+        3. Empeños en bloqueo: blocked → available (bloqueo y plazo vencidos)
+        4. Empeños recuperables: recoverable → available (plazo de recuperación vencido)
+
+        Returns:
+            Clave de TRANSITIONS o False si la orden no tiene transición pendiente
+        """
+        self.ensure_one()
+        if self.state == 'blocked' and self.blocking_end_date and self.blocking_end_date <= today:
+            if self.operation_type == 'purchase':
+                return 'purchase_available'
+            if self.recovery_deadline and self.recovery_deadline > today:
+                return 'pawn_recoverable'
+            if self.recovery_deadline:
+                return 'pawn_expired'
+        elif (self.state == 'recoverable' and
+                self.operation_type == 'recoverable' and
+                self.recovery_deadline and
+                self.recovery_deadline <= today):
+            return 'recovery_expired'
+        return False
+
+    @api.model
+    def _get_due_transitions_domain(self, today):
+        """Dominio único que cubre todas las transiciones candidatas.
+
+        Coincide con el índice parcial sobre `next_transition_date`, así que el
+        coste no depende del volumen histórico de órdenes cerradas.
+        """
+        return [
+            ('state', 'in', ('blocked', 'recoverable')),
+            ('next_transition_date', '<=', today),
+        ]
+
+    def _apply_state_transitions(self, today):
+        """Aplica en bloque las transiciones vencidas de las órdenes de self.
+
+        Agrupa las órdenes por tipo de transición para hacer una única
+        escritura por estado destino, y registra los mensajes de chatter con
+        `_message_log_batch` en vez de un `message_post` por orden. El tracking
+        del estado se desactiva para no crear otro mensaje por orden; el
+        mensaje indica el estado anterior y el nuevo.
+
+        Returns:
+            dict {tipo: (órdenes movidas, segundos)}
+        """
+        ids_by_kind = defaultdict(list)
+        for order in self:
+            kind = order._get_due_transition(today)
+            if kind:
+                ids_by_kind[kind].append(order.id)
+
+        state_labels = dict(self._fields['state']._description_selection(self.env))
+        result = {}
+        for kind, order_ids in ids_by_kind.items():
+            start = time.perf_counter()
+            orders = self.browse(order_ids)
+            target_state, body = TRANSITIONS[kind]
+            # El mensaje en bloque sustituye al tracking individual del estado:
+            # lleva el estado anterior y el nuevo para conservar la auditoría
+            bodies = {
+                order.id: '%s → %s. %s' % (
+                    state_labels[order.state],
+                    state_labels[target_state],
+                    body.format(recovery_deadline=order.recovery_deadline),
+                )
+                for order in orders
+            }
+            orders.with_context(mail_notrack=True).write({'state': target_state})
+            orders._message_log_batch(bodies=bodies)
+            result[kind] = (len(orders), time.perf_counter() - start)
+        return result
+
+    @api.model
+    def _get_transition_shards(self, today):
+        """Unidades de trabajo del cron: una por tienda con órdenes vencidas.
+
+        Returns:
+            Lista de (warehouse_id o None, número de órdenes pendientes)
+        """
+        groups = self._read_group(
+            self._get_due_transitions_domain(today),
+            groupby=['warehouse_id'],
+            aggregates=['__count'],
+        )
+        return [(warehouse.id or None, count) for warehouse, count in groups]
+
+    @api.model
+    def _lock_transition_chunk(self, warehouse_id, today, after_id, limit):
+        """Reserva el siguiente bloque de órdenes vencidas de una tienda.
+
+        Usa `FOR UPDATE SKIP LOCKED`: las órdenes bloqueadas por otro worker
+        se saltan, de modo que dos workers nunca procesan la misma orden.
+        """
+        self.flush_model(['state', 'next_transition_date', 'warehouse_id'])
+        self.env.cr.execute(self._get_transition_chunk_query(warehouse_id, today, after_id, limit))
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
+
+    @api.model
+    def _get_transition_chunk_query(self, warehouse_id, today, after_id, limit):
+        """Consulta de `_lock_transition_chunk`, también usada por `_explain_hot_queries`."""
+        warehouse_clause = (
+            SQL("warehouse_id = %s", warehouse_id) if warehouse_id else SQL("warehouse_id IS NULL")
+        )
+        return SQL("""
+            SELECT id
+              FROM jewelry_client_purchase
+             WHERE state IN ('blocked', 'recoverable')
+               AND next_transition_date <= %s
+               AND id > %s
+               AND %s
+          ORDER BY id
+             LIMIT %s
+               FOR UPDATE SKIP LOCKED
+        """, today, after_id, warehouse_clause, limit)
+
+    @api.model
+    def _run_state_transitions(self, today=None, chunk_size=TRANSITION_CHUNK_SIZE,
+                               auto_commit=False, worker=0):
+        """Motor de transiciones: calcula todas las transiciones en una pasada.
+
+        El trabajo se reparte por tienda. Cada worker recorre las tiendas
+        empezando por una distinta (según `worker`) y reserva bloques de
+        `chunk_size` órdenes con SKIP LOCKED, así que varios crons pueden
+        ejecutarse a la vez repartiéndose las tiendas sin solaparse.
+
+        Con `auto_commit` cada bloque se confirma al terminar, de modo que el
+        propio estado de las órdenes actúa como punto de control: si el
+        proceso se interrumpe, la siguiente ejecución continúa con las órdenes
+        que siguen pendientes sin repetir las ya movidas.
+
+        Returns:
+            dict {tipo: {'count': órdenes movidas, 'duration': segundos}}
+        """
+        today = today or fields.Date.today()
+        stats = {kind: {'count': 0, 'duration': 0.0} for kind in TRANSITIONS}
+
+        shards = self._get_transition_shards(today)
+        if shards:
+            # Cada worker empieza en su parte de la lista de tiendas
+            workers = self._get_transition_worker_count()
+            offset = len(shards) * (worker % workers) // workers
+            shards = shards[offset:] + shards[:offset]
+        total = sum(count for __, count in shards)
+        done = 0
+        for warehouse_id, __ in shards:
+            start = time.perf_counter()
+            moved = 0
+            last_id = 0
+            while True:
+                chunk = self._lock_transition_chunk(warehouse_id, today, last_id, chunk_size)
+                if not chunk:
+                    break
+                last_id = max(chunk.ids)
+                for kind, (count, duration) in chunk._apply_state_transitions(today).items():
+                    stats[kind]['count'] += count
+                    stats[kind]['duration'] += duration
+                moved += len(chunk)
+                done += len(chunk)
+                if auto_commit:
+                    self.env['ir.cron']._notify_progress(done=done, remaining=max(total - done, 0))
+                    self.env.cr.commit()
+                # Liberar la caché del bloque para mantener la memoria constante
+                self.env.invalidate_all()
+            if moved:
+                _logger.info(
+                    "Transiciones tienda %s: %d órdenes en %.2fs",
+                    warehouse_id, moved, time.perf_counter() - start,
+                )
+
+        for kind, values in stats.items():
+            if values['count']:
+                _logger.info(
+                    "Transición %s: %d órdenes en %.2fs",
+                    kind, values['count'], values['duration'],
+                )
+        return stats
+
+    @api.model
+    def _get_transition_worker_count(self):
+        """Workers del cron de transiciones (parámetro `jewelry.transition_workers`)."""
+        ICP = self.env['ir.config_parameter'].sudo()
+        return max(int(ICP.get_param(TRANSITION_WORKERS_PARAM, TRANSITION_WORKERS_DEFAULT)), 1)
+
+    @api.model
+    def _sync_transition_worker_crons(self):
+        """Crea o archiva los crons de worker según `jewelry.transition_workers`.
+
+        El cron principal es el worker 0; el worker `n` es una copia con
+        xmlid `cron_check_blocking_period_worker_<n + 1>`. Se llama al
+        instalar o actualizar el módulo y desde el propio cron, así que un
+        cambio del parámetro se aplica en la siguiente ejecución.
+        """
+        main = self.env.ref(f'jewelry_purchase_client.{TRANSITION_CRON_XMLID}', raise_if_not_found=False)
+        if not main:
+            return
+        workers = self._get_transition_worker_count()
+        IrModelData = self.env['ir.model.data'].sudo()
+        existing = {
+            data.name: self.env['ir.cron'].sudo().browse(data.res_id).exists()
+            for data in IrModelData.search([
+                ('module', '=', 'jewelry_purchase_client'),
+                ('model', '=', 'ir.cron'),
+                ('name', '=like', f'{TRANSITION_CRON_XMLID}_worker_%'),
+            ])
+        }
+        for worker in range(1, workers):
+            name = f'{TRANSITION_CRON_XMLID}_worker_{worker + 1}'
+            cron = existing.pop(name, None)
+            if cron:
+                if not cron.active:
+                    cron.active = True
+                continue
+            cron = main.sudo().copy({
+                'name': f'{main.name} (Worker {worker + 1})',
+                'code': f'model.cron_check_blocking_period(worker={worker})',
+                'active': True,
+            })
+            # noupdate: el registro no viene del XML y la actualización no debe borrarlo
+            IrModelData.create({
+                'module': 'jewelry_purchase_client',
+                'name': name,
+                'model': 'ir.cron',
+                'res_id': cron.id,
+                'noupdate': True,
+            })
+        for cron in existing.values():
+            if cron.active:
+                cron.active = False
+
+    def cron_check_blocking_period(self, worker=0):
+        """Cron job: procesa transiciones automáticas de estado.
+
+        Ver `_get_due_transition` para el detalle de las transiciones. Cada
+        registro de cron pasa un `worker` distinto para repartir las tiendas
+        (ver `_sync_transition_worker_crons`).
+        """
+        if not worker:
+            self._sync_transition_worker_crons()
+        self._run_state_transitions(auto_commit=True, worker=worker)
+        return True
@@ -0,0 +1,309 @@
+import logging
+from datetime import timedelta
+
+from odoo import api, fields, models
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+# Lotes con más líneas que esto se procesan en segundo plano
+JOB_LINE_THRESHOLD = 20
+# Líneas por bloque: cada bloque se confirma por separado
+JOB_CHUNK_SIZE = 20
+# Reintentos antes de dar el trabajo por fallido
+JOB_MAX_ATTEMPTS = 3
+
+
+class JewelryJob(models.Model):
+    """Trabajo en segundo plano para las acciones masivas de los asistentes.
+
+    Los asistentes de recepción y fundición encolan un trabajo cuando el lote
+    es grande. El cron `cron_process_jobs` se dispara al encolar y procesa las
+    líneas por bloques; solo toca líneas aún pendientes, de modo que repetir
+    un bloque tras un fallo no duplica productos ni movimientos.
+    """
+    _name = 'jewelry.job'
+    _description = 'Jewelry Background Job'
+    _order = 'id desc'
+
+    name = fields.Char(
+        string='Name',
+        required=True,
+        readonly=True,
+    )
+    job_type = fields.Selection([
+        ('receive_all', 'Receive All Items'),
+        ('smelt_all', 'Smelt All Items'),
+    ], string='Type', required=True, readonly=True)
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string='Status', default='pending', required=True, readonly=True, index=True)
+    purchase_id = fields.Many2one(
+        comodel_name='jewelry.client.purchase',
+        string='Purchase Order',
+        required=True,
+        readonly=True,
+        ondelete='cascade',
+    )
+    line_ids = fields.Many2many(
+        comodel_name='jewelry.client.purchase.line',
+        relation='jewelry_job_line_rel',
+        column1='job_id',
+        column2='line_id',
+        string='Items',
+        readonly=True,
+    )
+    smelting_batch_id = fields.Many2one(
+        comodel_name='jewelry.smelting.batch',
+        string='Smelting Batch',
+        readonly=True,
+        ondelete='set null',
+        help='Batch created by the job for the smelted items',
+    )
+    params = fields.Json(
+        string='Parameters',
+        readonly=True,
+        help='Wizard options the job was enqueued with',
+    )
+    user_id = fields.Many2one(
+        comodel_name='res.users',
+        string='Requested By',
+        required=True,
+        readonly=True,
+        default=lambda self: self.env.user,
+    )
+    company_id = fields.Many2one(
+        comodel_name='res.company',
+        string='Company',
+        required=True,
+        readonly=True,
+        default=lambda self: self.env.company,
+    )
+    total_count = fields.Integer(
+        string='Items',
+        readonly=True,
+    )
+    done_count = fields.Integer(
+        string='Processed',
+        readonly=True,
+    )
+    progress = fields.Float(
+        string='Progress',
+        compute='_compute_progress',
+    )
+    attempts = fields.Integer(
+        string='Attempts',
+        readonly=True,
+    )
+    error_message = fields.Text(
+        string='Last Error',
+        readonly=True,
+    )
+    date_next_attempt = fields.Datetime(
+        string='Next Attempt',
+        readonly=True,
+    )
+    date_done = fields.Datetime(
+        string='Finished On',
+        readonly=True,
+    )
+
+    @api.depends('done_count', 'total_count')
+    def _compute_progress(self):
+        for job in self:
+            job.progress = 100.0 * job.done_count / job.total_count if job.total_count else 0.0
+
+    @api.model
+    def _enqueue(self, job_type, purchase, lines, params=None):
+        """Crea un trabajo y despierta el cron que lo procesa."""
+        label = dict(self._fields['job_type'].selection)[job_type]
+        job = self.create({
+            'name': f'{label} - {purchase.name}',
+            'job_type': job_type,
+            'purchase_id': purchase.id,
+            'line_ids': [fields.Command.set(lines.ids)],
+            'params': params or {},
+            'total_count': len(lines),
+        })
+        self.env.ref('jewelry_purchase_client.cron_process_jobs')._trigger()
+        return job
+
+    def _action_notify_enqueued(self):
+        """Acción cliente que cierra el asistente avisando del encolado."""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': 'Processing in background',
+                'message': f'{self.total_count} items are being processed. '
+                           f'You will be notified when the job finishes.',
+                'type': 'info',
+                'sticky': False,
+                'next': {'type': 'ir.actions.act_window_close'},
+            },
+        }
+
+    def _get_pending_lines(self):
+        self.ensure_one()
+        return self.line_ids.filtered(lambda l: l.line_state == 'pending')
+
+    def _get_wizard(self):
+        """Asistente en memoria con las opciones guardadas en el trabajo."""
+        self.ensure_one()
+        params = self.params or {}
+        if self.job_type == 'receive_all':
+            return self.env['jewelry.receive.all.wizard'].new({
+                'purchase_id': self.purchase_id.id,
+                'warehouse_id': params.get('warehouse_id'),
+                'price_mode': params.get('price_mode', 'multiplier'),
+                'price_multiplier': params.get('price_multiplier', 1.5),
+            })
+        return self.env['jewelry.smelt.all.wizard'].new({
+            'purchase_id': self.purchase_id.id,
+        })
+
+    def _prepare(self):
+        """Crea lo que el trabajo necesita antes del primer bloque.
+
+        El lote de fundición se crea aquí y no en el asistente, para no dejar
+        lotes vacíos si el trabajo nunca llega a ejecutarse. Al reanudar se
+        reutiliza el ya creado.
+        """
+        self.ensure_one()
+        if self.job_type != 'smelt_all' or self.smelting_batch_id:
+            return
+        self.sudo().smelting_batch_id = self.env['jewelry.smelting.batch'].create({
+            'date': fields.Date.context_today(self),
+        })
+
+    def _run_chunk(self, lines):
+        """Procesa un bloque de líneas con la acción del asistente."""
+        self.ensure_one()
+        wizard = self._get_wizard()
+        if self.job_type == 'receive_all':
+            wizard._receive_lines(lines)
+        else:
+            wizard._smelt_lines(lines, self.smelting_batch_id)
+
+    def _finish(self):
+        """Mensaje final en la orden, cierre de la orden y aviso al usuario."""
+        self.ensure_one()
+        wizard = self._get_wizard()
+        if self.job_type == 'receive_all':
+            processed = self.line_ids.filtered(lambda l: l.line_state == 'in_inventory')
+            wizard._post_receive_message(processed.product_id)
+            message = f'{len(processed)} products created and added to inventory'
+        else:
+            batch = self.smelting_batch_id
+            processed = self.line_ids.filtered(lambda l: l.smelting_batch_id == batch)
+            wizard._post_smelt_message(processed, batch)
+            message = f'{len(processed)} items sent to smelting'
+        if self.line_ids:
+            self.line_ids[0]._check_order_completion()
+        self._notify_user(message, 'success')
+
+    def _notify_user(self, message, notification_type):
+        self.ensure_one()
+        self.env['bus.bus']._sendone(self.user_id.partner_id, 'simple_notification', {
+            'title': self.name,
+            'message': message,
+            'type': notification_type,
+            'sticky': notification_type == 'danger',
+        })
+
+    def _run_step(self, step, *args):
+        """Ejecuta un paso del trabajo en un savepoint.
+
+        Si falla se deshace solo ese paso y se anota el error (ver
+        `_handle_failure`).
+
+        Returns:
+            True si el paso terminó sin error
+        """
+        try:
+            with self.env.cr.savepoint():
+                step(*args)
+        except Exception as e:
+            _logger.exception("Job %s failed on %s", self.name, step.__name__)
+            self.invalidate_recordset()
+            self._handle_failure(e)
+            return False
+        return True
+
+    def _process(self, chunk_size=JOB_CHUNK_SIZE, auto_commit=False):
+        """Procesa el trabajo por bloques hasta terminar o fallar.
+
+        La preparación, cada bloque y el cierre se ejecutan en un savepoint:
+        si uno falla se deshace solo ese paso, se anota el error y el trabajo
+        vuelve a la cola con una espera creciente hasta agotar
+        `JOB_MAX_ATTEMPTS`. Al reanudar se repite el cierre si fue lo que falló.
+        """
+        self.ensure_one()
+        # Ejecutar con los permisos de quien lo encoló
+        job = self.with_user(self.user_id).with_company(self.company_id)
+        self.state = 'running'
+        if auto_commit:
+            self.env.cr.commit()
+
+        ok = self._run_step(job._prepare)
+        while ok:
+            lines = job._get_pending_lines()[:chunk_size]
+            if not lines:
+                break
+            ok = self._run_step(job._run_chunk, lines)
+            if ok:
+                self.done_count = self.total_count - len(job._get_pending_lines())
+                if auto_commit:
+                    self.env.cr.commit()
+        ok = ok and self._run_step(job._finish)
+        if ok:
+            self.write({'state': 'done', 'date_done': fields.Datetime.now(), 'error_message': False})
+        if auto_commit:
+            self.env.cr.commit()
+        return ok
+
+    def _handle_failure(self, error):
+        self.ensure_one()
+        attempts = self.attempts + 1
+        failed = attempts >= JOB_MAX_ATTEMPTS
+        self.write({
+            'attempts': attempts,
+            'error_message': str(error),
+            'state': 'failed' if failed else 'pending',
+        })
+        if failed:
+            self._notify_user(f'Job failed: {error}', 'danger')
+        else:
+            # Espera creciente antes del siguiente intento
+            next_attempt = fields.Datetime.now() + timedelta(minutes=5 * attempts)
+            self.date_next_attempt = next_attempt
+            self.env.ref('jewelry_purchase_client.cron_process_jobs')._trigger(next_attempt)
+
+    @api.model
+    def _cron_process_jobs(self):
+        """Cron job: procesa los trabajos en cola.
+
+        Los trabajos en `running` son los que una ejecución anterior dejó a
+        medias (reinicio del servidor, timeout): se reanudan sin repetir las
+        líneas ya procesadas.
+        """
+        jobs = self.search([
+            ('state', 'in', ('pending', 'running')),
+            '|', ('date_next_attempt', '=', False), ('date_next_attempt', '<=', fields.Datetime.now()),
+        ], order='id')
+        for index, job in enumerate(jobs):
+            job._process(auto_commit=True)
+            self.env['ir.cron']._notify_progress(done=index + 1, remaining=len(jobs) - index - 1)
+        return True
+
+    def action_retry(self):
+        """Vuelve a encolar trabajos fallidos."""
+        if self.filtered(lambda j: j.state != 'failed'):
+            raise UserError('Only failed jobs can be retried.')
+        self.write({'state': 'pending', 'attempts': 0, 'date_next_attempt': False})
+        self.env.ref('jewelry_purchase_client.cron_process_jobs')._trigger()
+        return True
@@ -0,0 +1,22 @@
+from odoo import models
+
+# Campos de la calidad de los que sale el fino de los lotes de fundición
+FINE_QUALITY_FIELDS = {'material_type', 'purity_percent'}
+
+
+class MaterialQuality(models.Model):
+    _inherit = 'jewelry.material.quality'
+
+    def write(self, vals):
+        """Ajusta el fino de los lotes con líneas de estas calidades."""
+        if not FINE_QUALITY_FIELDS.intersection(vals):
+            return super().write(vals)
+        Batch = self.env['jewelry.smelting.batch']
+        lines = self.env['jewelry.client.purchase.line'].search([
+            ('quality_id', 'in', self.ids),
+            ('smelting_batch_id', '!=', False),
+        ])
+        before = Batch._get_line_aggregates(lines.ids)
+        res = super().write(vals)
+        Batch._apply_line_deltas(before, Batch._get_line_aggregates(lines.ids))
+        return res
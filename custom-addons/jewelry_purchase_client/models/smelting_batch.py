@@ -1,4 +1,27 @@
+import logging
+
 from odoo import api, fields, models
+from odoo.tools import float_is_zero
+
+_logger = logging.getLogger(__name__)
+
+# Metales con total de fino propio en el lote
+FINE_METALS = ('gold', 'silver', 'platinum', 'palladium')
+
+# Campos de las líneas de los que salen los totales del lote
+BATCH_LINE_FIELDS = ('smelting_batch_id', 'weight', 'price', 'quality_id')
+# Totales del lote mantenidos por deltas, con los decimales que se comparan
+TOTAL_COLUMNS = [
+    'line_count', 'total_weight', 'total_value',
+    'fine_weight', *(f'fine_{metal}_weight' for metal in FINE_METALS),
+]
+TOTAL_DIGITS = [0, 3, 2] + [3] * (1 + len(FINE_METALS))
+# Fino (peso × pureza) de las líneas `l` con calidad `q`: total y por metal
+FINE_SUMS = ',\n                   '.join([
+    "COALESCE(SUM(l.weight * q.purity_percent / 100.0), 0) AS fine_weight",
+    *(f"COALESCE(SUM(l.weight * q.purity_percent / 100.0) FILTER (WHERE q.material_type = %s), 0)"
+      f" AS fine_{metal}_weight" for metal in FINE_METALS),
+])
 
 
 class SmeltingBatch(models.Model):
@@ -39,29 +62,78 @@ class SmeltingBatch(models.Model):
         inverse_name='smelting_batch_id',
         string='Items',
     )
+    # Totals maintained by deltas from the lines (see _apply_line_deltas)
     line_count = fields.Integer(
         string='Item Count',
-        compute='_compute_totals',
-        store=True,
+        readonly=True,
+        copy=False,
     )
     total_weight = fields.Float(
         string='Total Weight (g)',
-        compute='_compute_totals',
-        store=True,
+        readonly=True,
+        copy=False,
         digits=(10, 3),
     )
     total_value = fields.Monetary(
         string='Total Value',
-        compute='_compute_totals',
-        store=True,
+        readonly=True,
+        copy=False,
         currency_field='currency_id',
     )
+    # Fine metal: weight × purity of each line, per metal (also by deltas)
+    fine_gold_weight = fields.Float(
+        string='Fine Gold (g)',
+        readonly=True,
+        copy=False,
+        digits=(10, 3),
+    )
+    fine_silver_weight = fields.Float(
+        string='Fine Silver (g)',
+        readonly=True,
+        copy=False,
+        digits=(10, 3),
+    )
+    fine_platinum_weight = fields.Float(
+        string='Fine Platinum (g)',
+        readonly=True,
+        copy=False,
+        digits=(10, 3),
+    )
+    fine_palladium_weight = fields.Float(
+        string='Fine Palladium (g)',
+        readonly=True,
+        copy=False,
+        digits=(10, 3),
+    )
+    fine_weight = fields.Float(
+        string='Fine Weight (g)',
+        readonly=True,
+        copy=False,
+        digits=(10, 3),
+        help='Expected pure metal: sum of weight × purity of the items',
+    )
     state = fields.Selection([
         ('draft', 'Draft'),
         ('sent', 'Sent to Smelter'),
         ('received', 'Receipt Confirmed'),
     ], string='State', default='draft', required=True, tracking=True)
 
+    material_type = fields.Selection(
+        selection='_selection_material_type',
+        string='Material Type',
+        help='Metal of the batch when built by material',
+    )
+    purity_percent = fields.Float(
+        string='Purity (%)',
+        digits=(5, 2),
+        help='Purity of the batch when built by material',
+    )
+    warehouse_id = fields.Many2one(
+        comodel_name='stock.warehouse',
+        string='Tienda',
+        help='Store whose items were gathered in this batch',
+    )
+
     smelter_id = fields.Many2one(
         comodel_name='res.partner',
         string='Smelter',
@@ -77,6 +149,27 @@ class SmeltingBatch(models.Model):
         digits=(10, 3),
         help='Weight confirmed by smelter on receipt',
     )
+    # Reconciliation, fixed when the receipt is confirmed
+    expected_fine_weight = fields.Float(
+        string='Expected Fine Weight (g)',
+        digits=(10, 3),
+        readonly=True,
+        copy=False,
+        help='Fine weight of the batch when the receipt was confirmed',
+    )
+    loss_weight = fields.Float(
+        string='Loss (g)',
+        digits=(10, 3),
+        readonly=True,
+        copy=False,
+        help='Expected fine weight minus the weight confirmed by the smelter',
+    )
+    loss_percent = fields.Float(
+        string='Loss (%)',
+        digits=(5, 2),
+        readonly=True,
+        copy=False,
+    )
     receipt_reference = fields.Char(
         string='Receipt Reference',
         help='Smelter receipt or invoice reference',
@@ -87,12 +180,132 @@ class SmeltingBatch(models.Model):
          'Reference must be unique per company!'),
     ]
 
-    @api.depends('line_ids', 'line_ids.weight', 'line_ids.price')
-    def _compute_totals(self):
-        for batch in self:
-            batch.line_count = len(batch.line_ids)
-            batch.total_weight = sum(batch.line_ids.mapped('weight'))
-            batch.total_value = sum(batch.line_ids.mapped('price'))
+    @api.model
+    def _selection_material_type(self):
+        return self.env['jewelry.material.quality']._fields['material_type'].selection
+
+    @api.model
+    def _get_line_aggregates(self, line_ids):
+        """Contribución de las líneas dadas a los totales de sus lotes.
+
+        Returns:
+            dict {batch_id: valores en el orden de TOTAL_COLUMNS}
+        """
+        if not line_ids:
+            return {}
+        self.env['jewelry.client.purchase.line'].flush_model(list(BATCH_LINE_FIELDS))
+        self.env['jewelry.material.quality'].flush_model(['material_type', 'purity_percent'])
+        self.env.cr.execute(f"""
+            SELECT l.smelting_batch_id, COUNT(*), COALESCE(SUM(l.weight), 0), COALESCE(SUM(l.price), 0),
+                   {FINE_SUMS}
+              FROM jewelry_client_purchase_line l
+         LEFT JOIN jewelry_material_quality q ON q.id = l.quality_id
+             WHERE l.id = ANY(%s) AND l.smelting_batch_id IS NOT NULL
+          GROUP BY l.smelting_batch_id
+        """, [*FINE_METALS, list(line_ids)])
+        return {row[0]: row[1:] for row in self.env.cr.fetchall()}
+
+    @api.model
+    def _apply_line_deltas(self, before, after):
+        """Aplica a los totales la diferencia entre dos agregados de líneas.
+
+        Un único UPDATE incremental: no se leen las demás líneas del lote.
+        """
+        zero = (0,) * len(TOTAL_COLUMNS)
+        deltas = []
+        for batch_id in set(before) | set(after):
+            old = before.get(batch_id, zero)
+            new = after.get(batch_id, zero)
+            delta = tuple(n - o for n, o in zip(new, old))
+            if any(delta):
+                deltas.append((batch_id, *delta))
+        if not deltas:
+            return
+        self.flush_model(TOTAL_COLUMNS)
+        row = '(%s, %s' + ', %s::numeric' * (len(TOTAL_COLUMNS) - 1) + ')'
+        values = ', '.join([row] * len(deltas))
+        assignments = ', '.join(f"{column} = COALESCE(b.{column}, 0) + d.{column}" for column in TOTAL_COLUMNS)
+        self.env.cr.execute(f"""
+            UPDATE jewelry_smelting_batch b
+               SET {assignments}
+              FROM (VALUES {values}) AS d(batch_id, {', '.join(TOTAL_COLUMNS)})
+             WHERE b.id = d.batch_id
+        """, [value for delta in deltas for value in delta])
+        self.invalidate_model(TOTAL_COLUMNS)
+
+    @api.model
+    def _check_totals_drift(self, fix=True):
+        """Recalcula en SQL los totales y devuelve los lotes descuadrados.
+
+        Returns:
+            lista de (batch_id, totales guardados, totales reales), en el orden
+            de TOTAL_COLUMNS
+        """
+        self.flush_model(TOTAL_COLUMNS)
+        self.env['jewelry.client.purchase.line'].flush_model(list(BATCH_LINE_FIELDS))
+        self.env['jewelry.material.quality'].flush_model(['material_type', 'purity_percent'])
+        stored = ', '.join(f"COALESCE(b.{column}, 0)" for column in TOTAL_COLUMNS)
+        actual = ', '.join(f"a.{column}" for column in TOTAL_COLUMNS)
+        # Recuento exacto, pesos a 3 decimales e importe a 2
+        mismatch = ' OR '.join(
+            f"ROUND(COALESCE(b.{column}, 0)::numeric, {digits}) != ROUND(a.{column}::numeric, {digits})"
+            for column, digits in zip(TOTAL_COLUMNS, TOTAL_DIGITS)
+        )
+        self.env.cr.execute(f"""
+            WITH actual AS (
+                SELECT b.id AS batch_id,
+                       COUNT(l.id) AS line_count,
+                       COALESCE(SUM(l.weight), 0) AS total_weight,
+                       COALESCE(SUM(l.price), 0) AS total_value,
+                       {FINE_SUMS}
+                  FROM jewelry_smelting_batch b
+             LEFT JOIN jewelry_client_purchase_line l ON l.smelting_batch_id = b.id
+             LEFT JOIN jewelry_material_quality q ON q.id = l.quality_id
+              GROUP BY b.id
+            )
+            SELECT b.id, {stored}, {actual}
+              FROM jewelry_smelting_batch b
+              JOIN actual a ON a.batch_id = b.id
+             WHERE {mismatch}
+        """, list(FINE_METALS))
+        size = len(TOTAL_COLUMNS)
+        drift = [(row[0], row[1:size + 1], row[size + 1:]) for row in self.env.cr.fetchall()]
+        for batch_id, stored, actual in drift:
+            _logger.warning(
+                "Smelting batch %s totals drift: stored %s, actual %s",
+                batch_id, stored, actual,
+            )
+        if drift and fix:
+            row = '(%s, %s' + ', %s::numeric' * (size - 1) + ')'
+            values = ', '.join([row] * len(drift))
+            assignments = ', '.join(f"{column} = a.{column}" for column in TOTAL_COLUMNS)
+            self.env.cr.execute(f"""
+                UPDATE jewelry_smelting_batch b
+                   SET {assignments}
+                  FROM (VALUES {values}) AS a(batch_id, {', '.join(TOTAL_COLUMNS)})
+                 WHERE b.id = a.batch_id
+            """, [value for batch_id, __, actual in drift for value in (batch_id, *actual)])
+            self.invalidate_model(TOTAL_COLUMNS)
+        return drift
+
+    @api.model
+    def cron_check_totals(self):
+        """Cron job: detecta y corrige descuadres en los totales de los lotes."""
+        drift = self._check_totals_drift(fix=True)
+        if drift:
+            _logger.warning("Smelting batch totals: %d batch(es) repaired", len(drift))
+        return True
+
+    def _get_reconciliation_vals(self):
+        """Pérdida del fundidor: fino esperado frente al peso recibido."""
+        self.ensure_one()
+        expected = self.fine_weight
+        loss = expected - self.receipt_weight
+        return {
+            'expected_fine_weight': expected,
+            'loss_weight': loss,
+            'loss_percent': 0.0 if float_is_zero(expected, precision_digits=3) else 100.0 * loss / expected,
+        }
 
     @api.model_create_multi
     def create(self, vals_list):
@@ -120,9 +333,12 @@ class SmeltingBatch(models.Model):
             batch.write({
                 'state': 'received',
                 'receipt_date': batch.receipt_date or fields.Date.today(),
+                **batch._get_reconciliation_vals(),
             })
             batch.message_post(
                 body=f"Receipt confirmed. Weight: {batch.receipt_weight:.3f}g, "
+                     f"Expected fine: {batch.expected_fine_weight:.3f}g, "
+                     f"Loss: {batch.loss_weight:.3f}g ({batch.loss_percent:.2f}%), "
                      f"Reference: {batch.receipt_reference or 'N/A'}",
                 subject='Receipt Confirmed',
                 message_type='notification',
@@ -132,5 +348,10 @@ class SmeltingBatch(models.Model):
     def action_reset_draft(self):
         """Reset batch to draft state."""
         for batch in self:
-            batch.write({'state': 'draft'})
+            batch.write({
+                'state': 'draft',
+                'expected_fine_weight': 0.0,
+                'loss_weight': 0.0,
+                'loss_percent': 0.0,
+            })
         return True
@@ -0,0 +1 @@
+from . import smelting_loss_report
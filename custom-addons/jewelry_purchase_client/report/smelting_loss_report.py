@@ -0,0 +1,81 @@
+from odoo import fields, models, tools
+
+
+class SmeltingLossReport(models.Model):
+    """Pérdidas del fundidor por lote recibido (vista SQL).
+
+    Una fila por lote con recepción confirmada. Los totales se leen de los
+    campos almacenados del lote, así que el pivot agrega en base de datos sin
+    cargar lotes ni líneas.
+    """
+    _name = 'jewelry.smelting.loss.report'
+    _description = 'Smelter Loss Analysis'
+    _auto = False
+    _order = 'receipt_date desc'
+
+    batch_id = fields.Many2one(
+        comodel_name='jewelry.smelting.batch',
+        string='Batch',
+        readonly=True,
+    )
+    receipt_date = fields.Date(string='Receipt Date', readonly=True)
+    smelter_id = fields.Many2one(
+        comodel_name='res.partner',
+        string='Smelter',
+        readonly=True,
+    )
+    material_type = fields.Selection(
+        selection=lambda self: self.env['jewelry.material.quality']._fields['material_type'].selection,
+        string='Material Type',
+        readonly=True,
+    )
+    purity_percent = fields.Float(
+        string='Purity (%)',
+        digits=(5, 2),
+        readonly=True,
+        aggregator='avg',
+    )
+    warehouse_id = fields.Many2one(
+        comodel_name='stock.warehouse',
+        string='Tienda',
+        readonly=True,
+    )
+    company_id = fields.Many2one(
+        comodel_name='res.company',
+        string='Company',
+        readonly=True,
+    )
+    line_count = fields.Integer(string='Items', readonly=True)
+    total_weight = fields.Float(string='Gross Weight (g)', digits=(10, 3), readonly=True)
+    expected_fine_weight = fields.Float(string='Expected Fine (g)', digits=(10, 3), readonly=True)
+    receipt_weight = fields.Float(string='Received (g)', digits=(10, 3), readonly=True)
+    loss_weight = fields.Float(string='Loss (g)', digits=(10, 3), readonly=True)
+    loss_percent = fields.Float(
+        string='Loss (%)',
+        digits=(5, 2),
+        readonly=True,
+        aggregator='avg',
+    )
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute(f"""
+            CREATE OR REPLACE VIEW {self._table} AS (
+                SELECT b.id AS id,
+                       b.id AS batch_id,
+                       b.receipt_date,
+                       b.smelter_id,
+                       b.material_type,
+                       b.purity_percent,
+                       b.warehouse_id,
+                       b.company_id,
+                       b.line_count,
+                       b.total_weight,
+                       b.expected_fine_weight,
+                       b.receipt_weight,
+                       b.loss_weight,
+                       b.loss_percent
+                  FROM jewelry_smelting_batch b
+                 WHERE b.state = 'received'
+            )
+        """)
@@ -0,0 +1,2 @@
+from . import test_hot_query_indexes
+from . import test_order_totals_queries
@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+from ..models.client_purchase_transition import TRANSITION_INDEX
+
+# Órdenes sembradas: suficientes para que leer la tabla entera no sea lo barato
+SEED_ORDERS = 2000
+# Histórico de unos tres años, con pocas órdenes abiertas como en producción
+SEED_DAYS = 3 * 365
+SEED_OPEN_EVERY = 50
+SEED_CLOSED_STATES = ['available', 'processed', 'recovered']
+
+
+@tagged('post_install', '-at_install')
+class TestHotQueryIndexes(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env = cls.env(context=dict(cls.env.context, tracking_disable=True))
+        cls.partner = cls.env['res.partner'].create({'name': 'Cliente índices'})
+        today = fields.Date.today()
+        orders = cls.env['jewelry.client.purchase'].create([{
+            'partner_id': cls.partner.id,
+            'date': today - timedelta(days=index % SEED_DAYS),
+            'operation_type': 'recoverable' if index % 3 else 'purchase',
+            'line_ids': [fields.Command.create({
+                'description': f'Anillo {index}',
+                'price': 100.0,
+            }) for __ in range(2)],
+        } for index in range(SEED_ORDERS)])
+        # Estados repartidos sin pasar por las acciones: solo importa el volumen
+        states = {}
+        for index, order in enumerate(orders):
+            if index % SEED_OPEN_EVERY:
+                state = SEED_CLOSED_STATES[index % len(SEED_CLOSED_STATES)]
+            else:
+                state = 'recoverable' if order.operation_type == 'recoverable' else 'blocked'
+            states.setdefault(state, []).append(order.id)
+        for state, ids in states.items():
+            orders.browse(ids).write({'state': state})
+        cls.env.flush_all()
+        cls.env.cr.execute("ANALYZE jewelry_client_purchase, jewelry_client_purchase_line")
+
+    def test_hot_queries_use_indexes(self):
+        self.assertEqual(self.env['jewelry.client.purchase']._explain_hot_queries(), {})
+
+    def test_missing_index_is_reported(self):
+        # Sin el índice parcial el plan recorre la clave primaria con filtro
+        self.env.cr.execute(f"DROP INDEX {TRANSITION_INDEX}")
+        missing = self.env['jewelry.client.purchase']._explain_hot_queries()
+        self.assertIn('transition_shards', missing)
+        self.assertIn('transition_chunk', missing)
@@ -0,0 +1,45 @@
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+# Tamaños de lote comparados: el número de consultas no debe depender de él
+BATCH_SIZES = (5, 50)
+
+
+@tagged('post_install', '-at_install')
+class TestOrderTotalsQueries(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env = cls.env(context=dict(cls.env.context, tracking_disable=True))
+        partner = cls.env['res.partner'].create({'name': 'Cliente totales'})
+        attachments = cls.env['ir.attachment'].create([{
+            'name': f'foto_{index}.txt',
+            'raw': f'foto {index}'.encode(),
+            'mimetype': 'text/plain',
+        } for index in range(2)])
+        cls.orders = cls.env['jewelry.client.purchase'].create([{
+            'partner_id': partner.id,
+            'line_ids': [fields.Command.create({
+                'description': f'Anillo {index}',
+                'price': 100.0,
+                'image_ids': [fields.Command.set(attachments.ids)],
+            }) for __ in range(3)],
+        } for index in range(max(BATCH_SIZES))])
+        cls.env.flush_all()
+
+    def test_compute_queries_do_not_grow_with_batch(self):
+        Order = self.env['jewelry.client.purchase']
+        computed = [Order._fields['amount_total'], Order._fields['total_image_count']]
+        for size in BATCH_SIZES:
+            orders = self.orders[:size]
+            self.env.invalidate_all()
+            # Una consulta agrupada por cálculo, sea cual sea el nº de órdenes;
+            # protegidos como en el recálculo del ORM, sin pasar por write()
+            with self.env.protecting(computed, orders):
+                with self.assertQueryCount(1):
+                    orders._compute_amount_total()
+                with self.assertQueryCount(1):
+                    orders._compute_total_image_count()
+            self.assertEqual(orders.mapped('amount_total'), [300.0] * size)
+            self.assertEqual(orders.mapped('total_image_count'), [6] * size)
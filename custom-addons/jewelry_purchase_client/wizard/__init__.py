@@ -3,3 +3,4 @@ from . import send_to_inventory_wizard
 from . import smelt_all_wizard
 from . import receive_all_wizard
 from . import recovery_wizard
+from . import smelting_batch_builder
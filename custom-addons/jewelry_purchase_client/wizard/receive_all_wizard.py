@@ -1,6 +1,8 @@
 from odoo import api, fields, models
 from odoo.exceptions import UserError
 
+from ..models.jewelry_job import JOB_LINE_THRESHOLD
+
 
 class ReceiveAllWizard(models.TransientModel):
     _name = 'jewelry.receive.all.wizard'
@@ -66,19 +68,39 @@ class ReceiveAllWizard(models.TransientModel):
             wizard.total_value = sum(pending_lines.mapped('price'))
             wizard.line_ids = pending_lines
 
-    def action_confirm_receive(self):
-        """Create products for all pending items and add to inventory."""
-        self.ensure_one()
+    def _prepare_template_vals(self, line, sku):
+        """Values of the product template created for a received line."""
+        sale_price = line.price
+        if self.price_mode == 'multiplier':
+            sale_price = line.price * self.price_multiplier
+        return {
+            'name': line.description,
+            'default_code': sku,
+            'type': 'consu',
+            'is_storable': True,
+            'standard_price': line.price,
+            'list_price': sale_price,
+            'origin_type': 'client',
+            'jewelry_quality_id': line.quality_id.id if line.quality_id else False,
+            'jewelry_weight': line.weight,
+            'client_purchase_line_id': line.id,
+            'needs_repair': False,
+            'ready_for_sale': True,
+        }
 
-        pending_lines = self.purchase_id.line_ids.filtered(
-            lambda l: l.line_state == 'pending'
-        )
+    def _receive_lines(self, lines):
+        """Create products for the given lines and add them to inventory.
 
-        if not pending_lines:
-            raise UserError('No pending items to receive.')
+        Only lines still pending are received, so calling it again on the
+        same lines (e.g. when a background job retries) is harmless.
 
-        if self.purchase_id.state != 'available':
-            raise UserError('Order must be in Available state.')
+        Returns:
+            product.product recordset of the created products
+        """
+        self.ensure_one()
+        lines = lines.filtered(lambda l: l.line_state == 'pending')
+        if not lines:
+            return self.env['product.product']
 
         # Get destination location
         location_dest = self.warehouse_id.lot_stock_id
@@ -89,57 +111,49 @@ class ReceiveAllWizard(models.TransientModel):
             limit=1
         )
 
-        # Create products one by one to avoid batch creation issues
-        created_products = []
-        for line in pending_lines:
-            sale_price = line.price
-            if self.price_mode == 'multiplier':
-                sale_price = line.price * self.price_multiplier
-
-            # Generate SKU from purchase reference
-            sku = line._generate_sku()
-
-            # Create product template (type='consu' + is_storable=True for inventory tracking in Odoo 18)
-            template = self.env['product.template'].create({
-                'name': line.description,
-                'default_code': sku,
-                'type': 'consu',
-                'is_storable': True,
-                'standard_price': line.price,
-                'list_price': sale_price,
-                'origin_type': 'client',
-                'jewelry_quality_id': line.quality_id.id if line.quality_id else False,
-                'jewelry_weight': line.weight,
-                'client_purchase_line_id': line.id,
-                'needs_repair': False,
-                'ready_for_sale': True,
-            })
-            product = template.product_variant_id
-            created_products.append(product)
-
-            # Create stock move
-            move = self.env['stock.move'].create({
-                'name': f'Client purchase entry: {product.name}',
-                'product_id': product.id,
-                'product_uom_qty': 1.0,
-                'product_uom': product.uom_id.id,
-                'location_id': location_src.id,
-                'location_dest_id': location_dest.id,
-                'price_unit': line.price,
-            })
-            move._action_confirm()
-            move._action_assign()
-            # In Odoo 18, set quantity (done qty) before completing
-            move.quantity = 1.0
-            move._action_done()
-
-            # Update line
-            line.write({
-                'product_id': product.id,
-                'line_state': 'in_inventory',
-            })
+        # Allocate all SKUs in one pass
+        skus = lines._allocate_skus()
+
+        # Create all product templates in a single create call
+        # (type='consu' + is_storable=True for inventory tracking in Odoo 18)
+        templates = self.env['product.template'].create([
+            self._prepare_template_vals(line, skus[line.id])
+            for line in lines
+        ])
 
-        # Log to chatter
+        # One receipt holding one move per line, validated at once
+        picking = self.env['stock.picking'].create({
+            'picking_type_id': self.warehouse_id.in_type_id.id,
+            'location_id': location_src.id,
+            'location_dest_id': location_dest.id,
+            'origin': self.purchase_id.name,
+            'partner_id': self.purchase_id.partner_id.id,
+            'move_ids': [
+                fields.Command.create({
+                    'name': f'Client purchase entry: {template.name}',
+                    'product_id': template.product_variant_id.id,
+                    'product_uom_qty': 1.0,
+                    'product_uom': template.uom_id.id,
+                    'location_id': location_src.id,
+                    'location_dest_id': location_dest.id,
+                    'price_unit': template.client_purchase_line_id.price,
+                })
+                for template in templates
+            ],
+        })
+        picking.action_confirm()
+        # In Odoo 18, set quantity (done qty) before completing
+        picking.move_ids.write({'quantity': 1.0, 'picked': True})
+        picking._action_done()
+
+        # Link each line to its product; traceability is kept on the template
+        for template in templates:
+            template.client_purchase_line_id.product_id = template.product_variant_id
+        lines.write({'line_state': 'in_inventory'})
+        return templates.product_variant_id
+
+    def _post_receive_message(self, created_products):
+        """Log the received products on the purchase chatter."""
         items_summary = '<br/>'.join([
             f"- <a href='/web#id={p.id}&model=product.product'>{p.name}</a>"
             for p in created_products
@@ -154,6 +168,32 @@ class ReceiveAllWizard(models.TransientModel):
             message_type='notification',
         )
 
+    def action_confirm_receive(self):
+        """Create products for all pending items and add to inventory."""
+        self.ensure_one()
+
+        pending_lines = self.purchase_id.line_ids.filtered(
+            lambda l: l.line_state == 'pending'
+        )
+
+        if not pending_lines:
+            raise UserError('No pending items to receive.')
+
+        if self.purchase_id.state != 'available':
+            raise UserError('Order must be in Available state.')
+
+        # Large lots run in background to stay clear of the request timeout
+        if len(pending_lines) > JOB_LINE_THRESHOLD:
+            job = self.env['jewelry.job']._enqueue('receive_all', self.purchase_id, pending_lines, params={
+                'warehouse_id': self.warehouse_id.id,
+                'price_mode': self.price_mode,
+                'price_multiplier': self.price_multiplier,
+            })
+            return job._action_notify_enqueued()
+
+        created_products = self._receive_lines(pending_lines)
+        self._post_receive_message(created_products)
+
         # Check if order should transition to processed
         pending_lines[0]._check_order_completion()
 
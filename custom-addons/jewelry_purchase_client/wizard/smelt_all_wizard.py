@@ -1,6 +1,8 @@
 from odoo import api, fields, models
 from odoo.exceptions import UserError
 
+from ..models.jewelry_job import JOB_LINE_THRESHOLD
+
 
 class SmeltAllWizard(models.TransientModel):
     _name = 'jewelry.smelt.all.wizard'
@@ -49,6 +51,34 @@ class SmeltAllWizard(models.TransientModel):
             wizard.total_value = sum(pending_lines.mapped('price'))
             wizard.line_ids = pending_lines
 
+    def _smelt_lines(self, lines, batch):
+        """Send the given lines to smelting under `batch`.
+
+        Only lines still pending are moved, so a retried call is harmless.
+        """
+        lines = lines.filtered(lambda l: l.line_state == 'pending')
+        # Update all lines to smelting state with batch reference
+        lines.write({
+            'line_state': 'to_smelting',
+            'smelting_batch_id': batch.id,
+        })
+        return lines
+
+    def _post_smelt_message(self, lines, batch):
+        """Log the smelting batch on the purchase chatter."""
+        total_weight = sum(lines.mapped('weight'))
+        total_value = sum(lines.mapped('price'))
+        self.purchase_id.message_post(
+            body=f"<b>{len(lines)}</b> items sent to smelting<br/>"
+                 f"<ul>"
+                 f"<li>Batch: <a href='/web#id={batch.id}&model=jewelry.smelting.batch'>{batch.name}</a></li>"
+                 f"<li>Total weight: {total_weight:.3f} g</li>"
+                 f"<li>Total value: {total_value:.2f} {self.currency_id.symbol}</li>"
+                 f"</ul>",
+            subject='Items sent to smelting',
+            message_type='notification',
+        )
+
     def action_confirm_smelt(self):
         """Send all pending items to smelting."""
         self.ensure_one()
@@ -63,28 +93,19 @@ class SmeltAllWizard(models.TransientModel):
         if self.purchase_id.state != 'available':
             raise UserError('Order must be in Available state.')
 
+        # Large lots run in background to stay clear of the request timeout;
+        # the job creates its own smelting batch
+        if len(pending_lines) > JOB_LINE_THRESHOLD:
+            job = self.env['jewelry.job']._enqueue('smelt_all', self.purchase_id, pending_lines)
+            return job._action_notify_enqueued()
+
         # Create smelting batch for traceability
         batch = self.env['jewelry.smelting.batch'].create({
             'date': fields.Date.today(),
         })
 
-        # Update all lines to smelting state with batch reference
-        pending_lines.write({
-            'line_state': 'to_smelting',
-            'smelting_batch_id': batch.id,
-        })
-
-        # Log to chatter with batch reference
-        self.purchase_id.message_post(
-            body=f"<b>{len(pending_lines)}</b> items sent to smelting<br/>"
-                 f"<ul>"
-                 f"<li>Batch: <a href='/web#id={batch.id}&model=jewelry.smelting.batch'>{batch.name}</a></li>"
-                 f"<li>Total weight: {self.total_weight:.3f} g</li>"
-                 f"<li>Total value: {self.total_value:.2f} {self.currency_id.symbol}</li>"
-                 f"</ul>",
-            subject='Items sent to smelting',
-            message_type='notification',
-        )
+        self._smelt_lines(pending_lines, batch)
+        self._post_smelt_message(pending_lines, batch)
 
         # Check if order should transition to processed
         pending_lines[0]._check_order_completion()
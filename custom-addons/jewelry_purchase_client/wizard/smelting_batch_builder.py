@@ -0,0 +1,215 @@
+from markupsafe import Markup, escape
+
+from odoo import api, fields, models
+from odoo.exceptions import UserError
+
+
+class SmeltingBatchBuilder(models.TransientModel):
+    """Agrupa en lotes de fundición las piezas de muchas órdenes.
+
+    Las líneas candidatas se seleccionan y agrupan por (metal, pureza) con una
+    sola consulta agregada, sin cargar las líneas en memoria. Cada grupo se
+    asigna a su lote con una única escritura.
+    """
+    _name = 'jewelry.smelting.batch.builder'
+    _description = 'Smelting Batch Builder'
+
+    warehouse_id = fields.Many2one(
+        comodel_name='stock.warehouse',
+        string='Tienda',
+        help='Only items purchased in this store. Leave empty for all stores.',
+    )
+    material_type = fields.Selection(
+        selection=lambda self: self.env['jewelry.material.quality']._fields['material_type'].selection,
+        string='Material Type',
+        help='Only items of this metal. Leave empty for all metals.',
+    )
+    date_from = fields.Date(string='From')
+    date_to = fields.Date(string='To')
+    include_pending = fields.Boolean(
+        string='Include pending items',
+        default=True,
+        help='Also gather pending items of orders available to process, '
+             'not only items already sent to smelting without a batch.',
+    )
+    smelter_id = fields.Many2one(
+        comodel_name='res.partner',
+        string='Smelter',
+        domain="[('is_company', '=', True)]",
+    )
+
+    # Preview (computed)
+    candidate_count = fields.Integer(
+        string='Items',
+        compute='_compute_preview',
+    )
+    total_weight = fields.Float(
+        string='Total Weight (g)',
+        compute='_compute_preview',
+        digits=(10, 3),
+    )
+    preview_html = fields.Html(
+        string='Batches to create',
+        compute='_compute_preview',
+        sanitize=False,
+    )
+
+    def _get_candidate_query(self):
+        """FROM/WHERE de las líneas candidatas y sus parámetros."""
+        self.ensure_one()
+        conditions = [
+            "l.company_id = %s",
+            "l.smelting_batch_id IS NULL",
+        ]
+        params = [self.env.company.id]
+        if self.include_pending:
+            conditions.append(
+                "(l.line_state = 'to_smelting' OR (l.line_state = 'pending' AND o.state = 'available'))"
+            )
+        else:
+            conditions.append("l.line_state = 'to_smelting'")
+        if self.warehouse_id:
+            conditions.append("o.warehouse_id = %s")
+            params.append(self.warehouse_id.id)
+        if self.material_type:
+            conditions.append("COALESCE(q.material_type, 'other') = %s")
+            params.append(self.material_type)
+        if self.date_from:
+            conditions.append("o.date >= %s")
+            params.append(self.date_from)
+        if self.date_to:
+            conditions.append("o.date <= %s")
+            params.append(self.date_to)
+        query = f"""
+              FROM jewelry_client_purchase_line l
+              JOIN jewelry_client_purchase o ON o.id = l.order_id
+         LEFT JOIN jewelry_material_quality q ON q.id = l.quality_id
+             WHERE {' AND '.join(conditions)}
+        """
+        return query, params
+
+    def _get_candidate_groups(self, with_ids=False):
+        """Grupos (metal, pureza) de las líneas candidatas.
+
+        Returns:
+            lista de dicts con material_type, purity_percent, count, weight,
+            value y, si `with_ids`, los ids de las líneas y de sus órdenes
+        """
+        self.ensure_one()
+        self.env['jewelry.client.purchase.line'].flush_model()
+        self.env['jewelry.client.purchase'].flush_model(['state', 'warehouse_id', 'date'])
+        query, params = self._get_candidate_query()
+        ids_column = ", array_agg(l.id ORDER BY l.id), array_agg(DISTINCT l.order_id)" if with_ids else ""
+        self.env.cr.execute(f"""
+            SELECT COALESCE(q.material_type, 'other'),
+                   COALESCE(q.purity_percent, 0),
+                   COUNT(*),
+                   COALESCE(SUM(l.weight), 0),
+                   COALESCE(SUM(l.price), 0)
+                   {ids_column}
+            {query}
+          GROUP BY 1, 2
+          ORDER BY 1, 2 DESC
+        """, params)
+        keys = ['material_type', 'purity_percent', 'count', 'weight', 'value', 'line_ids', 'order_ids']
+        return [dict(zip(keys, row)) for row in self.env.cr.fetchall()]
+
+    @api.depends('warehouse_id', 'material_type', 'date_from', 'date_to', 'include_pending')
+    def _compute_preview(self):
+        material_labels = dict(self._fields['material_type']._description_selection(self.env))
+        for wizard in self:
+            groups = wizard._get_candidate_groups()
+            wizard.candidate_count = sum(group['count'] for group in groups)
+            wizard.total_weight = sum(group['weight'] for group in groups)
+            rows = Markup('').join(
+                Markup('<tr><td>%s</td><td class="text-end">%.2f %%</td>'
+                       '<td class="text-end">%d</td><td class="text-end">%.3f g</td></tr>') % (
+                    escape(material_labels.get(group['material_type'], group['material_type'])),
+                    group['purity_percent'], group['count'], group['weight'],
+                )
+                for group in groups
+            )
+            wizard.preview_html = Markup(
+                '<table class="table table-sm"><thead><tr>'
+                '<th>Material</th><th class="text-end">Purity</th>'
+                '<th class="text-end">Items</th><th class="text-end">Weight</th>'
+                '</tr></thead><tbody>%s</tbody></table>'
+            ) % rows if groups else False
+
+    def action_build(self):
+        """Crea un lote por (metal, pureza) y asigna sus líneas."""
+        self.ensure_one()
+        groups = self._get_candidate_groups(with_ids=True)
+        if not groups:
+            raise UserError('No items match the selected filters.')
+
+        Line = self.env['jewelry.client.purchase.line']
+        batches = self.env['jewelry.smelting.batch'].create([{
+            'date': fields.Date.today(),
+            'material_type': group['material_type'],
+            'purity_percent': group['purity_percent'],
+            'warehouse_id': self.warehouse_id.id,
+            'smelter_id': self.smelter_id.id,
+        } for group in groups])
+
+        order_ids = set()
+        for batch, group in zip(batches, groups):
+            lines = Line.browse(group['line_ids'])
+            # Una escritura por lote: un UPDATE por bloque de ids
+            lines.write({
+                'line_state': 'to_smelting',
+                'smelting_batch_id': batch.id,
+            })
+            batch.message_post(
+                body=f"Batch built with <b>{group['count']}</b> items "
+                     f"({group['weight']:.3f} g)",
+                subject='Batch Built',
+                message_type='notification',
+            )
+            order_ids.update(group['order_ids'])
+
+        self._log_on_orders(order_ids, batches)
+        self._process_completed_orders(order_ids)
+
+        return {
+            'type': 'ir.actions.act_window',
+            'name': 'Smelting Batches',
+            'res_model': 'jewelry.smelting.batch',
+            'view_mode': 'list,form',
+            'domain': [('id', 'in', batches.ids)],
+        }
+
+    def _log_on_orders(self, order_ids, batches):
+        """Un mensaje por orden afectada, registrado en bloque."""
+        self.env['jewelry.client.purchase.line'].flush_model(['line_state', 'smelting_batch_id'])
+        self.env.cr.execute("""
+            SELECT order_id, smelting_batch_id, COUNT(*)
+              FROM jewelry_client_purchase_line
+             WHERE order_id = ANY(%s) AND smelting_batch_id = ANY(%s)
+          GROUP BY order_id, smelting_batch_id
+        """, [list(order_ids), batches.ids])
+        names = {batch.id: batch.name for batch in batches}
+        bodies = {}
+        for order_id, batch_id, count in self.env.cr.fetchall():
+            bodies[order_id] = bodies.get(order_id, Markup('')) + Markup(
+                "<b>%d</b> items sent to smelting batch "
+                "<a href='/web#id=%d&model=jewelry.smelting.batch'>%s</a><br/>"
+            ) % (count, batch_id, names[batch_id])
+        self.env['jewelry.client.purchase'].browse(bodies)._message_log_batch(bodies=bodies)
+
+    def _process_completed_orders(self, order_ids):
+        """Cierra las órdenes disponibles que ya no tienen líneas pendientes."""
+        self.env.cr.execute("""
+            SELECT o.id
+              FROM jewelry_client_purchase o
+             WHERE o.id = ANY(%s)
+               AND o.state = 'available'
+               AND NOT EXISTS (
+                   SELECT 1 FROM jewelry_client_purchase_line l
+                    WHERE l.order_id = o.id AND l.line_state = 'pending'
+               )
+        """, [list(order_ids)])
+        orders = self.env['jewelry.client.purchase'].browse(
+            [row[0] for row in self.env.cr.fetchall()]
+        )
+        orders.action_process()
@@ -1,6 +1,6 @@
 {
     'name': 'Joyería: Informes Policiales',
-    'version': '18.0.1.0.0',
+    'version': '18.0.1.3.0',
     'category': 'Jewelry',
     'summary': 'Informes para Mossos d\'Esquadra (Excel/PDF)',
     'description': """
@@ -14,6 +14,7 @@
         - Exportación a PDF con fotos de artículos y documentos de identidad
         - Filtros por fecha, estado, tienda y tipo de operación
         - Wizard intuitivo para generación de informes
+        - Fragmentos diarios precalculados por tienda (cron nocturno)
 
         IMPORTANTE: La cabecera del Excel NO es editable. Se genera
         exactamente como requiere la policía para procesamiento automático.
@@ -29,6 +30,7 @@
     },
     'data': [
         'security/ir.model.access.csv',
+        'data/cron_data.xml',
         'wizard/police_report_wizard_views.xml',
         'report/police_report_pdf.xml',
         'views/menu_views.xml',
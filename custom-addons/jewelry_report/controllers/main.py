@@ -0,0 +1,41 @@
+from werkzeug.exceptions import Forbidden
+
+from odoo import api, http
+from odoo.exceptions import AccessError
+from odoo.http import content_disposition, request
+from odoo.modules.registry import Registry
+
+from ..wizard.police_report_wizard import DOWNLOAD_FORMATS
+
+
+class PoliceReportController(http.Controller):
+
+    @http.route('/jewelry_report/police/download', type='http', auth='user')
+    def police_report_download(self, token, **kwargs):
+        """Envía el informe policial mientras se genera.
+
+        Los filtros llegan en un token firmado, así que el informe no se
+        guarda en el asistente ni en el filestore. La respuesta no lleva
+        Content-Length y se envía por trozos (chunked transfer encoding)
+        según se produce.
+        """
+        try:
+            wizard = request.env['jewelry.report.police.wizard']._from_download_token(token)
+        except AccessError:
+            raise Forbidden()
+        mimetype = DOWNLOAD_FORMATS[wizard.output_format][1]
+        filename = wizard._get_download_filename()
+
+        # El cursor de la petición se cierra antes de enviar el cuerpo: el
+        # generador abre el suyo con el mismo usuario y contexto
+        dbname, uid, context = request.db, request.env.uid, dict(request.env.context)
+
+        def generate():
+            with Registry(dbname).cursor() as cr:
+                env = api.Environment(cr, uid, context)
+                yield from env['jewelry.report.police.wizard']._from_download_token(token)._iter_download()
+
+        return request.make_response(generate(), headers=[
+            ('Content-Type', mimetype),
+            ('Content-Disposition', content_disposition(filename)),
+        ])
@@ -0,0 +1,5 @@
+from . import police_report_fragment
+from . import client_purchase
+from . import res_partner
+from . import stock_warehouse
+from . import jewelry_product
@@ -0,0 +1,77 @@
+from dateutil.relativedelta import relativedelta
+
+from odoo import api, fields, models
+from odoo.addons.jewelry_purchase_client.models.client_purchase_indexes import POLICE_REPORT_INDEX
+
+# Campos que aparecen en el informe policial: cambiarlos invalida el fragmento del día
+FRAGMENT_ORDER_FIELDS = {
+    'state', 'date', 'warehouse_id', 'company_id', 'partner_id',
+    'operation_type', 'name', 'currency_id',
+}
+FRAGMENT_LINE_FIELDS = {
+    'order_id', 'sequence', 'description', 'inscriptions', 'jewelry_type_id',
+    'quality_id', 'weight', 'price', 'image_ids',
+}
+
+
+class ClientPurchaseOrder(models.Model):
+    _inherit = 'jewelry.client.purchase'
+
+    def _get_police_fragment_keys(self):
+        return {(order.date, order.warehouse_id.id) for order in self}
+
+    def _invalidate_police_fragments(self, keys=None):
+        """Borra los fragmentos del informe policial de los días de estas órdenes."""
+        keys = (keys or set()) | self._get_police_fragment_keys()
+        self.env['jewelry.report.police.fragment']._invalidate(keys)
+
+    @api.model
+    def _get_hot_queries(self):
+        queries = super()._get_hot_queries()
+        # Página del informe policial de un mes con los filtros por defecto
+        wizard = self.env['jewelry.report.police.wizard'].new({
+            'date_from': fields.Date.context_today(self) - relativedelta(months=1),
+            'date_to': fields.Date.context_today(self),
+            'warehouse_ids': [fields.Command.set(self.env['stock.warehouse'].search([], limit=1).ids)],
+        })
+        queries['police_report_rows'] = (wizard._get_police_rows_query(), (POLICE_REPORT_INDEX,))
+        return queries
+
+    def write(self, vals):
+        if not FRAGMENT_ORDER_FIELDS.intersection(vals):
+            return super().write(vals)
+        # El día o la tienda pueden cambiar: invalidar el de antes y el de después
+        keys = self._get_police_fragment_keys()
+        res = super().write(vals)
+        self._invalidate_police_fragments(keys)
+        return res
+
+    def unlink(self):
+        keys = self._get_police_fragment_keys()
+        res = super().unlink()
+        self.env['jewelry.report.police.fragment']._invalidate(keys)
+        return res
+
+
+class ClientPurchaseOrderLine(models.Model):
+    _inherit = 'jewelry.client.purchase.line'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        lines.order_id._invalidate_police_fragments()
+        return lines
+
+    def write(self, vals):
+        if not FRAGMENT_LINE_FIELDS.intersection(vals):
+            return super().write(vals)
+        keys = self.order_id._get_police_fragment_keys()
+        res = super().write(vals)
+        self.order_id._invalidate_police_fragments(keys)
+        return res
+
+    def unlink(self):
+        keys = self.order_id._get_police_fragment_keys()
+        res = super().unlink()
+        self.env['jewelry.report.police.fragment']._invalidate(keys)
+        return res
@@ -0,0 +1,40 @@
+from odoo import models
+
+
+class JewelryType(models.Model):
+    _inherit = 'jewelry.type'
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'name' in vals:
+            self._invalidate_police_fragments()
+        return res
+
+    def unlink(self):
+        # Las líneas pierden el tipo por SQL (ondelete), sin pasar por write
+        self._invalidate_police_fragments()
+        return super().unlink()
+
+    def _invalidate_police_fragments(self):
+        self.env['jewelry.report.police.fragment']._invalidate_orders("""
+            EXISTS (
+                SELECT 1 FROM jewelry_client_purchase_line l
+                 WHERE l.order_id = o.id AND l.jewelry_type_id = ANY(%s)
+            )
+        """, [self.ids])
+
+
+class MaterialQuality(models.Model):
+    _inherit = 'jewelry.material.quality'
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'name' in vals:
+            # El nombre de la calidad se imprime en el PDF
+            self.env['jewelry.report.police.fragment']._invalidate_orders("""
+                EXISTS (
+                    SELECT 1 FROM jewelry_client_purchase_line l
+                     WHERE l.order_id = o.id AND l.quality_id = ANY(%s)
+                )
+            """, [self.ids])
+        return res
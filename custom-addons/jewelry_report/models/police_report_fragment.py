@@ -0,0 +1,227 @@
+import base64
+import logging
+import os
+import tempfile
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+# Fragmentos generados por ejecución del cron; si quedan más se vuelve a disparar
+FRAGMENT_BATCH_SIZE = 50
+
+
+class PoliceReportFragment(models.Model):
+    """Informe policial ya generado de un día y una tienda.
+
+    Los días pasados no cambian una vez sus órdenes salen de borrador, así
+    que el cron nocturno guarda para cada (día, tienda) las filas del Excel
+    y el PDF. El asistente monta cualquier rango con estos fragmentos y solo
+    consulta en vivo los días sin fragmento (hoy incluido).
+
+    El fragmento contiene todas las órdenes confirmadas del día, con su
+    estado y tipo de operación en cada fila, para poder aplicar cualquier
+    filtro del asistente. Cualquier cambio en una orden o sus líneas, o en
+    los datos del cliente, la tienda, el tipo de joya o la calidad que el
+    informe imprime, borra el fragmento de su día y el cron lo vuelve a
+    generar.
+    """
+    _name = 'jewelry.report.police.fragment'
+    _description = 'Police Report Daily Fragment'
+    _order = 'date desc, warehouse_id'
+
+    date = fields.Date(
+        string='Date',
+        required=True,
+        readonly=True,
+        index=True,
+    )
+    warehouse_id = fields.Many2one(
+        comodel_name='stock.warehouse',
+        string='Tienda',
+        required=True,
+        readonly=True,
+        ondelete='cascade',
+    )
+    company_id = fields.Many2one(
+        comodel_name='res.company',
+        string='Company',
+        required=True,
+        readonly=True,
+    )
+    lang = fields.Char(
+        string='Language',
+        required=True,
+        readonly=True,
+        help='Language the fragment was rendered in',
+    )
+    rows = fields.Json(
+        string='Excel Rows',
+        readonly=True,
+        help='Excel rows of the day in report order, with state and operation type',
+    )
+    order_ids = fields.Json(
+        string='Orders',
+        readonly=True,
+        help='Ids of the orders in the PDF, in report order',
+    )
+    line_count = fields.Integer(
+        string='Lines',
+        readonly=True,
+    )
+    pdf_file = fields.Binary(
+        string='PDF',
+        attachment=True,
+        readonly=True,
+    )
+
+    _sql_constraints = [
+        ('date_warehouse_unique', 'UNIQUE(date, warehouse_id)',
+         'Only one police report fragment per day and store!'),
+    ]
+
+    @api.model
+    def _get_fragments(self, groups):
+        """Fragmentos utilizables para los grupos (fecha, tienda) dados.
+
+        Solo sirven los generados en el idioma del usuario: el nombre del
+        tipo de joya va traducido en las filas.
+
+        Returns:
+            dict {(fecha, warehouse_id): fragmento}
+        """
+        groups = set(groups)
+        if not groups:
+            return {}
+        fragments = self.sudo().search([
+            ('date', 'in', list({date for date, __ in groups})),
+            ('lang', '=', self.env.lang or 'en_US'),
+        ])
+        return {
+            (fragment.date, fragment.warehouse_id.id): fragment
+            for fragment in fragments
+            if (fragment.date, fragment.warehouse_id.id) in groups
+        }
+
+    @api.model
+    def _invalidate(self, keys):
+        """Borra los fragmentos de los (fecha, warehouse_id) dados."""
+        keys = {(date, warehouse_id) for date, warehouse_id in keys if date and warehouse_id}
+        if not keys:
+            return
+        fragments = self.sudo().search([
+            ('date', 'in', list({date for date, __ in keys})),
+            ('warehouse_id', 'in', list({warehouse_id for __, warehouse_id in keys})),
+        ])
+        fragments.filtered(lambda f: (f.date, f.warehouse_id.id) in keys).unlink()
+
+    @api.model
+    def _invalidate_orders(self, where, params):
+        """Borra los fragmentos de los días de las órdenes `o` que cumplen `where`.
+
+        Para los cambios en datos que el informe copia de otros modelos
+        (cliente, tienda, tipo de joya), sin cargar las órdenes afectadas.
+        """
+        self.env['jewelry.client.purchase'].flush_model(['date', 'warehouse_id', 'partner_id'])
+        self.env['jewelry.client.purchase.line'].flush_model(['order_id', 'jewelry_type_id', 'quality_id'])
+        self.env.cr.execute(f"""
+            SELECT DISTINCT o.date, o.warehouse_id
+              FROM jewelry_client_purchase o
+             WHERE o.warehouse_id IS NOT NULL
+               AND {where}
+        """, params)
+        self._invalidate(self.env.cr.fetchall())
+
+    @api.model
+    def _get_missing_keys(self, limit=None):
+        """Días pasados y tiendas con órdenes confirmadas y sin fragmento."""
+        self.env['jewelry.client.purchase'].flush_model(['date', 'state', 'warehouse_id'])
+        self.env['jewelry.client.purchase.line'].flush_model(['order_id'])
+        self.flush_model(['date', 'warehouse_id'])
+        self.env.cr.execute("""
+            SELECT o.date, o.warehouse_id
+              FROM jewelry_client_purchase o
+             WHERE o.state NOT IN ('draft', 'cancelled')
+               AND o.date < %s
+               AND o.warehouse_id IS NOT NULL
+               AND EXISTS (
+                   SELECT 1 FROM jewelry_client_purchase_line l WHERE l.order_id = o.id
+               )
+               AND NOT EXISTS (
+                   SELECT 1 FROM jewelry_report_police_fragment f
+                    WHERE f.date = o.date AND f.warehouse_id = o.warehouse_id
+               )
+          GROUP BY o.date, o.warehouse_id
+          ORDER BY o.date DESC, o.warehouse_id
+             LIMIT %s
+        """, [fields.Date.context_today(self), limit])
+        return self.env.cr.fetchall()
+
+    @api.model
+    def _build(self, date, warehouse):
+        """Genera el fragmento de un día y una tienda."""
+        from ..report.police_report_pdf import PoliceReportPdf
+
+        lang = warehouse.company_id.partner_id.lang or self.env.lang or 'en_US'
+        wizard = self.env['jewelry.report.police.wizard'].with_company(
+            warehouse.company_id,
+        ).with_context(lang=lang).new({
+            'date_from': date,
+            'date_to': date,
+            'include_blocked': True,
+            'include_recoverable': True,
+            'include_available': True,
+            'include_processed': True,
+            'include_recovered': True,
+            'warehouse_ids': [fields.Command.set(warehouse.ids)],
+            'operation_type': 'all',
+        })
+        group = (date, warehouse.id)
+        rows = [
+            dict(row, key=[row['key'][0].isoformat()] + list(row['key'][1:]))
+            for row in wizard._iter_live_rows(group)
+        ]
+        orders = wizard._get_pdf_orders(group)
+        if not orders:
+            return self.browse()
+
+        fd, path = tempfile.mkstemp(suffix='.pdf', prefix='police_fragment_')
+        os.close(fd)
+        try:
+            PoliceReportPdf(wizard.env).generate_to_file(orders, path)
+            with open(path, 'rb') as file:
+                pdf = file.read()
+        finally:
+            os.unlink(path)
+
+        return self.create({
+            'date': date,
+            'warehouse_id': warehouse.id,
+            'company_id': warehouse.company_id.id,
+            'lang': lang,
+            'rows': rows,
+            'order_ids': orders.ids,
+            'line_count': len(rows),
+            'pdf_file': base64.b64encode(pdf),
+        })
+
+    @api.model
+    def cron_build_fragments(self, batch_size=FRAGMENT_BATCH_SIZE):
+        """Cron job: genera los fragmentos que faltan, del más reciente al más antiguo."""
+        keys = self._get_missing_keys(limit=batch_size)
+        Warehouse = self.env['stock.warehouse']
+        built = 0
+        for index, (date, warehouse_id) in enumerate(keys):
+            try:
+                with self.env.cr.savepoint():
+                    self._build(date, Warehouse.browse(warehouse_id))
+                built += 1
+            except Exception:
+                _logger.exception("Police report fragment %s / %s failed", date, warehouse_id)
+            self.env['ir.cron']._notify_progress(done=index + 1, remaining=len(keys) - index - 1)
+            self.env.cr.commit()
+            self.env.invalidate_all()
+        if built and len(keys) == batch_size:
+            # Quedan más días pendientes (primera ejecución o muchas invalidaciones)
+            self.env.ref('jewelry_report.cron_build_police_fragments')._trigger()
+        return True
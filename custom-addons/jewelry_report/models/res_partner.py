@@ -0,0 +1,31 @@
+from odoo import models
+
+# Datos del cliente impresos en el informe policial
+FRAGMENT_PARTNER_FIELDS = {
+    'name', 'vat', 'street', 'city', 'zip', 'state_id',
+    'id_document_front', 'id_document_back',
+}
+
+
+class ResPartner(models.Model):
+    _inherit = 'res.partner'
+
+    def write(self, vals):
+        res = super().write(vals)
+        if FRAGMENT_PARTNER_FIELDS.intersection(vals):
+            self.env['jewelry.report.police.fragment']._invalidate_orders(
+                "o.partner_id = ANY(%s)", [self.ids],
+            )
+        return res
+
+
+class MergePartnerAutomatic(models.TransientModel):
+    _inherit = 'base.partner.merge.automatic.wizard'
+
+    def _merge(self, partner_ids, dst_partner=None, extra_checks=True):
+        # La fusión reasigna partner_id por SQL, sin pasar por write: se
+        # invalidan antes los días de todas las órdenes de los contactos
+        self.env['jewelry.report.police.fragment']._invalidate_orders(
+            "o.partner_id = ANY(%s)", [list(partner_ids)],
+        )
+        return super()._merge(partner_ids, dst_partner=dst_partner, extra_checks=extra_checks)
@@ -0,0 +1,14 @@
+from odoo import models
+
+
+class StockWarehouse(models.Model):
+    _inherit = 'stock.warehouse'
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'name' in vals:
+            # El nombre de la tienda va en cada fila del informe
+            self.env['jewelry.report.police.fragment'].sudo().search([
+                ('warehouse_id', 'in', self.ids),
+            ]).unlink()
+        return res
@@ -1 +1,3 @@
 from . import police_report_excel
+from . import police_report_pdf
+from . import police_report_document
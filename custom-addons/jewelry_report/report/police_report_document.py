@@ -0,0 +1,66 @@
+from odoo import api, models
+
+# Fotos del documento de identidad impresas en el informe
+PARTNER_DOCUMENT_FIELDS = ['id_document_front', 'id_document_back']
+
+
+class PoliceReportDocument(models.AbstractModel):
+    """Valores del PDF policial.
+
+    Las imágenes se imprimen en huecos de 120 px, así que en lugar del
+    original (fotos de móvil de varios MB) se incrusta la versión 'report'
+    de `jewelry.image.rendition`, cacheada por checksum. Las que falten se
+    generan aquí en bloque, una vez por contenido.
+    """
+    _name = 'report.jewelry_report.report_police_document'
+    _description = 'Police Report PDF'
+
+    @api.model
+    def _get_report_values(self, docids, data=None):
+        orders = self.env['jewelry.client.purchase'].browse(docids)
+        return {
+            'doc_ids': docids,
+            'doc_model': 'jewelry.client.purchase',
+            'docs': orders,
+            'line_images': self._get_line_images(orders.line_ids),
+            'partner_images': self._get_partner_images(orders.partner_id),
+        }
+
+    @api.model
+    def _get_line_images(self, lines):
+        """{line_id: imagen en base64} de la primera foto de cada línea."""
+        attachments = lines._get_report_image_attachments()
+        renditions = self.env['jewelry.image.rendition'].sudo()._get_renditions(attachments, 'report')
+        images = {}
+        for line in lines:
+            attachment = line.image_ids[:1]
+            if not attachment:
+                continue
+            rendition = renditions.get(attachment.id)
+            # Sin versión reducida (no es una imagen válida): se usa el original
+            images[line.id] = rendition.datas if rendition else attachment.datas
+        return images
+
+    @api.model
+    def _get_partner_images(self, partners):
+        """{(partner_id, campo): imagen en base64} de los documentos de identidad.
+
+        Los campos Image se guardan como adjuntos, así que su checksum sirve
+        de clave de la caché igual que el de las fotos de las líneas.
+        """
+        attachments = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', 'res.partner'),
+            ('res_field', 'in', PARTNER_DOCUMENT_FIELDS),
+            ('res_id', 'in', partners.ids),
+        ])
+        renditions = self.env['jewelry.image.rendition'].sudo()._get_renditions(attachments, 'report')
+        images = {}
+        for attachment in attachments:
+            rendition = renditions.get(attachment.id)
+            if rendition:
+                images[attachment.res_id, attachment.res_field] = rendition.datas
+        for partner in partners:
+            for field_name in PARTNER_DOCUMENT_FIELDS:
+                if (partner.id, field_name) not in images and partner[field_name]:
+                    images[partner.id, field_name] = partner[field_name]
+        return images
@@ -1,6 +1,3 @@
-import base64
-from io import BytesIO
-
 import xlsxwriter
 
 
@@ -24,11 +21,18 @@ class PoliceReportExcel:
         'S/N - INSCRIPCIONS',
     ]
 
-    def generate(self, lines_data):
-        """Generate the Excel file with the exact required header.
+    # Column widths (approximate based on content)
+    COLUMN_WIDTHS = [15, 30, 12, 12, 25, 15, 40, 25]
+
+    def generate_to_file(self, lines_data, path):
+        """Stream the Excel file to `path` with constant memory usage.
+
+        xlsxwriter's constant_memory mode flushes each row to disk as soon
+        as the next one starts, so `lines_data` can be any iterable
+        (e.g. a generator reading lines by chunks) and is consumed once.
 
         Args:
-            lines_data: List of dicts with keys:
+            lines_data: iterable of dicts with keys:
                 - contract_number
                 - client_name
                 - dni
@@ -37,12 +41,16 @@ class PoliceReportExcel:
                 - jewelry_type
                 - description
                 - inscriptions
+            path: destination file path
 
         Returns:
-            Base64 encoded Excel file content
+            Number of data rows written
         """
-        output = BytesIO()
-        workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+        workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+        return self._write_workbook(workbook, lines_data)
+
+    def _write_workbook(self, workbook, lines_data):
+        """Write header and rows in order, then close the workbook."""
         worksheet = workbook.add_worksheet('Informe Policial')
 
         # Header format
@@ -62,16 +70,15 @@ class PoliceReportExcel:
             'text_wrap': True,
         })
 
-        # Column widths (approximate based on content)
-        column_widths = [15, 30, 12, 12, 25, 15, 40, 25]
-        for col, width in enumerate(column_widths):
+        for col, width in enumerate(self.COLUMN_WIDTHS):
             worksheet.set_column(col, col, width)
 
         # Write header row (row 0) - EXACT format required
         for col, header in enumerate(self.HEADERS):
             worksheet.write(0, col, header, header_format)
 
-        # Write data rows (starting from row 1)
+        # Write data rows (starting from row 1), strictly in row order
+        row = 0
         for row, line in enumerate(lines_data, start=1):
             worksheet.write(row, 0, line.get('contract_number', ''), data_format)
             worksheet.write(row, 1, line.get('client_name', ''), data_format)
@@ -88,9 +95,8 @@ class PoliceReportExcel:
         worksheet.freeze_panes(1, 0)
 
         # Auto-filter for easy filtering
-        if lines_data:
-            worksheet.autofilter(0, 0, len(lines_data), len(self.HEADERS) - 1)
+        if row:
+            worksheet.autofilter(0, 0, row, len(self.HEADERS) - 1)
 
         workbook.close()
-        output.seek(0)
-        return base64.b64encode(output.read())
+        return row
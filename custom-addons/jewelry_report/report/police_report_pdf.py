@@ -0,0 +1,200 @@
+import base64
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from odoo.addons.base.models.ir_actions_report import _get_wkhtmltopdf_bin
+from odoo.exceptions import UserError
+from odoo.tools import split_every
+from odoo.tools.pdf import PdfFileReader, PdfFileWriter
+
+_logger = logging.getLogger(__name__)
+
+
+class PoliceReportPdf:
+    """Generator for the police PDF split in chunks of orders.
+
+    Each chunk is rendered to HTML by the ORM (main thread) and converted
+    by its own wkhtmltopdf process; up to `workers` processes run at the
+    same time. Chunks are handled in waves of `workers`, so at any moment
+    only that many chunks are in memory, whatever the size of the report.
+    The chunk PDFs are then merged in order with qpdf, which copies the
+    pages from file to file, and the first page of each chunk in the merged
+    document is returned as a page index.
+
+    Daily fragments are rendered the same way and later assembled with live
+    chunks.
+    """
+
+    REPORT_XMLID = 'jewelry_report.action_report_police_pdf'
+
+    def __init__(self, env, chunk_size=50, workers=None):
+        self.env = env
+        self.chunk_size = chunk_size
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.report = env.ref(self.REPORT_XMLID)
+
+    def generate_to_file(self, orders, path):
+        """Write the police PDF of `orders` to `path`.
+
+        Returns:
+            list of (first order id of the chunk, first page number): page
+            index of each chunk in the merged document
+        """
+        return self.assemble_to_file([orders], path)
+
+    def assemble_to_file(self, parts, path):
+        """Write to `path` a PDF made of `parts`, in that order.
+
+        Each part is either a recordset of orders, rendered here by chunks,
+        or a `jewelry.report.police.fragment` whose PDF was rendered
+        beforehand and is copied as is.
+        """
+        with tempfile.TemporaryDirectory(prefix='police_pdf_') as tmpdir:
+            sources = []
+            chunks = []
+            for part in parts:
+                if part._name == 'jewelry.report.police.fragment':
+                    fragment_path = os.path.join(tmpdir, f'fragment_{part.id}.pdf')
+                    with open(fragment_path, 'wb') as file:
+                        file.write(base64.b64decode(part.pdf_file))
+                    sources.append((part.order_ids[0], fragment_path))
+                    continue
+                for chunk_ids in split_every(self.chunk_size, part.ids):
+                    sources.append((chunk_ids[0], len(chunks)))
+                    chunks.append(chunk_ids)
+            pdf_paths = self._render_chunks(chunks, tmpdir)
+            sources = [
+                (first_id, pdf_paths[source] if isinstance(source, int) else source)
+                for first_id, source in sources
+            ]
+            return self._merge(sources, path)
+
+    def _render_chunks(self, chunks, tmpdir):
+        """Render each chunk of order ids to its own PDF file.
+
+        Returns:
+            list of PDF paths, one per chunk
+        """
+        args = None
+        pdf_paths = []
+        for wave in split_every(self.workers, chunks):
+            jobs = []
+            for chunk_ids in wave:
+                index = len(pdf_paths) + len(jobs)
+                html_paths, layout_args, paperformat_args = self._write_chunk_html(chunk_ids, tmpdir, index)
+                if args is None:
+                    args = self._get_wkhtmltopdf_args(paperformat_args)
+                jobs.append((layout_args + html_paths, os.path.join(tmpdir, f'chunk_{index:05d}.pdf')))
+            # Liberar la caché del ORM entre oleadas
+            self.env.invalidate_all(flush=False)
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                list(executor.map(lambda job: self._run_wkhtmltopdf(args, *job), jobs))
+            pdf_paths.extend(pdf_path for __, pdf_path in jobs)
+        return pdf_paths
+
+    def _write_chunk_html(self, order_ids, tmpdir, index):
+        """Render one chunk with the report template into HTML files.
+
+        The header and footer of the company layout are written next to the
+        bodies and passed to wkhtmltopdf as in the single-pass report.
+
+        Returns:
+            (list of body file paths, --header-html/--footer-html arguments,
+            paper format arguments of the template)
+        """
+        report = self.report
+        html = report._render_qweb_html(report.report_name, order_ids)[0]
+        bodies, __, header, footer, paperformat_args = report._prepare_html(html, report_model=report.report_name)
+        layout_args = []
+        for name, content in (('header', header), ('footer', footer)):
+            if not content:
+                continue
+            layout_path = os.path.join(tmpdir, f'chunk_{index:05d}_{name}.html')
+            with open(layout_path, 'wb') as file:
+                file.write(content.encode())
+            layout_args += [f'--{name}-html', layout_path]
+        paths = []
+        for body_num, body in enumerate(bodies):
+            html_path = os.path.join(tmpdir, f'chunk_{index:05d}_{body_num:03d}.html')
+            with open(html_path, 'wb') as file:
+                file.write(body.encode())
+            paths.append(html_path)
+        return paths, layout_args, paperformat_args
+
+    def _get_wkhtmltopdf_args(self, paperformat_args):
+        """Command line shared by every chunk, built once from the paper format."""
+        report = self.report
+        return [_get_wkhtmltopdf_bin(), '--quiet'] + report._build_wkhtmltopdf_args(
+            report.get_paperformat(), False, specific_paperformat_args=paperformat_args,
+        )
+
+    @staticmethod
+    def _run_wkhtmltopdf(args, input_args, pdf_path):
+        """Convert one chunk. Runs in a worker thread: no ORM access here."""
+        process = subprocess.run(
+            args + input_args + [pdf_path],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False,
+        )
+        if process.returncode not in (0, 1):
+            _logger.error("wkhtmltopdf failed on %s: %s", pdf_path, process.stderr.decode(errors='replace'))
+            raise UserError('Error al generar el PDF del informe policial.')
+
+    def _merge(self, chunk_paths, path):
+        """Merge the chunk PDFs into `path`, in order.
+
+        Returns:
+            list of (first order id of the chunk, first page number)
+        """
+        page_index = []
+        number = 0
+        for first_order_id, chunk_path in chunk_paths:
+            page_index.append((first_order_id, number + 1))
+            number += self._count_pages(chunk_path)
+        paths = [chunk_path for __, chunk_path in chunk_paths]
+        qpdf = shutil.which('qpdf')
+        if qpdf:
+            self._merge_qpdf(qpdf, paths, path)
+        else:
+            _logger.warning("qpdf not found: merging the police PDF in memory")
+            self._merge_in_memory(paths, path)
+        return page_index
+
+    @staticmethod
+    def _count_pages(pdf_path):
+        """Page count, read from the page tree without loading the content."""
+        with open(pdf_path, 'rb') as file:
+            return PdfFileReader(file).getNumPages()
+
+    @staticmethod
+    def _merge_qpdf(qpdf, paths, path):
+        """Concatenate with qpdf, reading and writing the pages from disk."""
+        process = subprocess.run(
+            [qpdf, '--empty', '--pages', *paths, '--', path],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False,
+        )
+        # 3: terminado con avisos
+        if process.returncode not in (0, 3):
+            _logger.error("qpdf failed on %s: %s", path, process.stderr.decode(errors='replace'))
+            raise UserError('Error al generar el PDF del informe policial.')
+
+    @staticmethod
+    def _merge_in_memory(paths, path):
+        """Fallback without qpdf: PdfFileWriter holds every page until written."""
+        files = []
+        try:
+            writer = PdfFileWriter()
+            for pdf_path in paths:
+                file = open(pdf_path, 'rb')
+                files.append(file)
+                reader = PdfFileReader(file)
+                for page_num in range(reader.getNumPages()):
+                    writer.addPage(reader.getPage(page_num))
+            with open(path, 'wb') as output:
+                writer.write(output)
+        finally:
+            for file in files:
+                file.close()
@@ -1,7 +1,55 @@
 import base64
+import heapq
+import io
+import json
+import os
+import tempfile
+import time
+import zipfile
+from itertools import groupby
+from operator import itemgetter
+from urllib.parse import urlencode
+
+from markupsafe import Markup
 
 from odoo import api, fields, models
-from odoo.exceptions import UserError
+from odoo.exceptions import AccessError, UserError
+from odoo.tools import SQL, consteq
+from odoo.tools.misc import hmac
+
+# Líneas leídas por bloque al generar el Excel
+EXCEL_CHUNK_SIZE = 1000
+# Bytes por trozo de la respuesta de descarga
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# Validez del enlace de descarga firmado, en segundos
+DOWNLOAD_TOKEN_MAX_AGE = 3600
+DOWNLOAD_TOKEN_SCOPE = 'jewelry_report.police_download'
+# Formato de salida -> (extensión, tipo MIME)
+DOWNLOAD_FORMATS = {
+    'excel': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'pdf': ('pdf', 'application/pdf'),
+    'pdf_zip': ('zip', 'application/zip'),
+}
+
+
+class _ZipStream(io.RawIOBase):
+    """Non-seekable sink for zipfile: keeps what was written until popped."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def pop(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
 
 
 class PoliceReportWizard(models.TransientModel):
@@ -65,35 +113,85 @@ class PoliceReportWizard(models.TransientModel):
         selection=[
             ('excel', 'Excel (.xlsx)'),
             ('pdf', 'PDF'),
+            ('pdf_zip', 'PDF por día y tienda (.zip)'),
         ],
         string='Formato',
         default='excel',
         required=True,
     )
 
-    # Generated file (for download)
-    file_data = fields.Binary(
-        string='Archivo',
-        readonly=True,
-    )
-    file_name = fields.Char(
-        string='Nombre del Archivo',
-        readonly=True,
-    )
-
     # Preview count
     record_count = fields.Integer(
         string='Registros Encontrados',
         compute='_compute_record_count',
     )
+    breakdown_html = fields.Html(
+        string='Desglose',
+        compute='_compute_record_count',
+        sanitize=False,
+    )
 
     @api.depends('date_from', 'date_to', 'include_blocked', 'include_recoverable',
                  'include_available', 'include_processed', 'include_recovered',
                  'warehouse_ids', 'operation_type')
     def _compute_record_count(self):
+        state_labels = dict(
+            self.env['jewelry.client.purchase']._fields['state']._description_selection(self.env)
+        )
         for wizard in self:
-            lines = wizard._get_purchase_lines()
-            wizard.record_count = len(lines)
+            counts = wizard._get_record_breakdown() if wizard.date_from and wizard.date_to else []
+            wizard.record_count = sum(count for __, __, count in counts)
+            wizard.breakdown_html = wizard._render_breakdown(counts, state_labels) if counts else False
+
+    def _get_record_breakdown(self):
+        """Line count per store and state, from one grouped COUNT query.
+
+        Returns:
+            list of (warehouse name, state, count)
+        """
+        self.ensure_one()
+        where, params = self._get_police_lines_where()
+        if not where:
+            return []
+        self.env['jewelry.client.purchase.line'].flush_model(['order_id'])
+        self.env['jewelry.client.purchase'].flush_model(
+            ['date', 'state', 'company_id', 'warehouse_id', 'operation_type']
+        )
+        self.env.cr.execute(f"""
+            SELECT w.name, o.state, COUNT(*)
+              FROM jewelry_client_purchase_line l
+              JOIN jewelry_client_purchase o ON o.id = l.order_id
+         LEFT JOIN stock_warehouse w ON w.id = o.warehouse_id
+             WHERE {where}
+          GROUP BY w.name, o.state
+          ORDER BY w.name, o.state
+        """, params)
+        return self.env.cr.fetchall()
+
+    @staticmethod
+    def _render_breakdown(counts, state_labels):
+        """Table store × state with the line counts."""
+        states = sorted({state for __, state, __ in counts}, key=list(state_labels).index)
+        by_store = {}
+        for store, state, count in counts:
+            by_store.setdefault(store or 'Sin tienda', {})[state] = count
+        header = Markup('').join(
+            Markup('<th class="text-end">%s</th>') % state_labels.get(state, state) for state in states
+        )
+        rows = Markup('').join(
+            Markup('<tr><td>%s</td>%s<td class="text-end"><b>%d</b></td></tr>') % (
+                store,
+                Markup('').join(
+                    Markup('<td class="text-end">%d</td>') % values.get(state, 0) for state in states
+                ),
+                sum(values.values()),
+            )
+            for store, values in by_store.items()
+        )
+        return Markup(
+            '<table class="table table-sm mb-0"><thead><tr><th>Tienda</th>%s'
+            '<th class="text-end">Total</th></tr></thead><tbody>%s</tbody></table>'
+        ) % (header, rows)
 
     def _get_selected_states(self):
         """Return list of selected states based on boolean fields."""
@@ -110,110 +208,343 @@ class PoliceReportWizard(models.TransientModel):
             states.append('recovered')
         return states
 
-    def _get_purchase_lines(self):
-        """Get purchase lines matching the filter criteria."""
-        self.ensure_one()
+    def _get_police_lines_where(self, group=None):
+        """WHERE clause over lines `l` and orders `o` matching the filters.
 
+        Dates, selected states, warehouses and operation type of the wizard,
+        restricted to the allowed companies, for the raw SQL paths of the
+        report. `group` narrows it to one (date, warehouse_id) of the range.
+
+        Returns:
+            (sql, params) or (None, None) when no state is selected
+        """
+        self.ensure_one()
         states = self._get_selected_states()
         if not states:
-            return self.env['jewelry.client.purchase.line'].browse()
+            return None, None
 
-        # Build domain
-        domain = [
-            ('order_id.date', '>=', self.date_from),
-            ('order_id.date', '<=', self.date_to),
-            ('order_id.state', 'in', states),
+        conditions = [
+            "o.date >= %s",
+            "o.date <= %s",
+            "o.state = ANY(%s)",
+            "o.company_id = ANY(%s)",
         ]
-
-        # Warehouse filter
+        params = [self.date_from, self.date_to, states, self.env.companies.ids]
         if self.warehouse_ids:
-            domain.append(('order_id.warehouse_id', 'in', self.warehouse_ids.ids))
-
-        # Operation type filter
-        if self.operation_type == 'purchase':
-            domain.append(('order_id.operation_type', '=', 'purchase'))
-        elif self.operation_type == 'recoverable':
-            domain.append(('order_id.operation_type', '=', 'recoverable'))
-
-        return self.env['jewelry.client.purchase.line'].search(
-            domain,
-            order='order_id, sequence, id',
-        )
-
-    def _prepare_excel_data(self, lines):
-        """Prepare data rows for Excel export.
-
-        Returns list of dicts with keys matching the required Excel columns.
+            conditions.append("o.warehouse_id = ANY(%s)")
+            params.append(self.warehouse_ids.ids)
+        if self.operation_type in ('purchase', 'recoverable'):
+            conditions.append("o.operation_type = %s")
+            params.append(self.operation_type)
+        if group:
+            conditions += ["o.date = %s", "o.warehouse_id IS NOT DISTINCT FROM %s"]
+            params += [group[0], group[1] or None]
+        return ' AND '.join(conditions), params
+
+    def _get_police_rows_query(self, after=None, limit=EXCEL_CHUNK_SIZE, group=None):
+        """Query of `_fetch_police_rows`, or None when no state is selected."""
+        self.ensure_one()
+        where, params = self._get_police_lines_where(group)
+        if not where:
+            return None
+        if after:
+            date, order_id, sequence, line_id = after
+            where += """
+               AND (o.date < %s
+                    OR (o.date = %s AND o.id < %s)
+                    OR (o.date = %s AND o.id = %s AND (COALESCE(l.sequence, 0), l.id) > (%s, %s)))
+            """
+            params = params + [date, date, order_id, date, order_id, sequence, line_id]
+        lang = self.env.lang or 'en_US'
+        return SQL(f"""
+            SELECT o.date, o.id, COALESCE(l.sequence, 0), l.id,
+                   o.name,
+                   p.name,
+                   p.vat,
+                   to_char(o.date, 'DD/MM/YYYY'),
+                   w.name,
+                   COALESCE(t.name->>%s, t.name->>'en_US'),
+                   l.description,
+                   l.inscriptions,
+                   o.state,
+                   o.operation_type
+              FROM jewelry_client_purchase_line l
+              JOIN jewelry_client_purchase o ON o.id = l.order_id
+         LEFT JOIN res_partner p ON p.id = o.partner_id
+         LEFT JOIN stock_warehouse w ON w.id = o.warehouse_id
+         LEFT JOIN jewelry_type t ON t.id = l.jewelry_type_id
+             WHERE {where}
+          ORDER BY o.date DESC, o.id DESC, COALESCE(l.sequence, 0), l.id
+             LIMIT %s
+        """, lang, *params, limit)
+
+    def _fetch_police_rows(self, after=None, limit=EXCEL_CHUNK_SIZE, group=None):
+        """Fetch one page of Excel rows with a single joined query.
+
+        Rows follow the report order (orders by date desc, id desc, then
+        line sequence and id). Pages are read by keyset: pass the `key` of
+        the last row as `after` to get the next page.
+
+        Returns:
+            list of dicts with the Excel keys plus `key`, `state` and
+            `operation_type`
         """
-        data = []
-        for line in lines:
-            order = line.order_id
-            partner = order.partner_id
-
-            # Format date as DD/MM/YYYY
-            date_str = order.date.strftime('%d/%m/%Y') if order.date else ''
-
-            data.append({
-                'contract_number': order.name or '',
-                'client_name': partner.name or '',
-                'dni': partner.vat or '',
-                'purchase_date': date_str,
-                'store': order.warehouse_id.name if order.warehouse_id else '',
-                'jewelry_type': line.jewelry_type_id.name if line.jewelry_type_id else '',
-                'description': line.description or '',
-                'inscriptions': line.inscriptions or 'SN INSCRIPCIONS',
-            })
-        return data
+        self.ensure_one()
+        query = self._get_police_rows_query(after, limit, group)
+        if query is None:
+            return []
+        self.env.cr.execute(query)
+        return [{
+            'key': (date, order_id, sequence, line_id),
+            'contract_number': contract or '',
+            'client_name': client or '',
+            'dni': vat or '',
+            'purchase_date': date_str or '',
+            'store': store or '',
+            'jewelry_type': jewelry_type or '',
+            'description': description or '',
+            'inscriptions': inscriptions or 'SN INSCRIPCIONS',
+            'state': state,
+            'operation_type': operation_type,
+        } for (date, order_id, sequence, line_id, contract, client, vat, date_str, store,
+               jewelry_type, description, inscriptions, state, operation_type) in self.env.cr.fetchall()]
 
     def action_generate(self):
-        """Generate the police report in selected format."""
-        self.ensure_one()
+        """Generate the police report in selected format.
 
-        lines = self._get_purchase_lines()
-        if not lines:
+        The report is not generated here: the returned URL carries the
+        filters as a signed token and the controller streams the file while
+        it is being built, without storing it anywhere.
+        """
+        self.ensure_one()
+        if not self.record_count:
             raise UserError('No se encontraron registros con los filtros seleccionados.')
+        return {
+            'type': 'ir.actions.act_url',
+            'url': '/jewelry_report/police/download?' + urlencode({'token': self._get_download_token()}),
+            'target': 'new',
+        }
 
-        if self.output_format == 'excel':
-            return self._generate_excel(lines)
-        else:
-            return self._generate_pdf(lines)
+    def _get_filters(self):
+        """Filter values, JSON serializable, as stored in the download token."""
+        self.ensure_one()
+        return {
+            'date_from': fields.Date.to_string(self.date_from),
+            'date_to': fields.Date.to_string(self.date_to),
+            'include_blocked': self.include_blocked,
+            'include_recoverable': self.include_recoverable,
+            'include_available': self.include_available,
+            'include_processed': self.include_processed,
+            'include_recovered': self.include_recovered,
+            'warehouse_ids': self.warehouse_ids.ids,
+            'operation_type': self.operation_type,
+            'output_format': self.output_format,
+        }
 
-    def _generate_excel(self, lines):
-        """Generate Excel file and return download action."""
-        from ..report.police_report_excel import PoliceReportExcel
+    def _get_download_token(self):
+        """Filters signed with the database secret, valid for the current user only."""
+        payload = dict(self._get_filters(), uid=self.env.uid, exp=int(time.time()) + DOWNLOAD_TOKEN_MAX_AGE)
+        payload = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+        return f'{payload}.{hmac(self.env(su=True), DOWNLOAD_TOKEN_SCOPE, payload)}'
 
-        data = self._prepare_excel_data(lines)
-        generator = PoliceReportExcel()
-        file_content = generator.generate(data)
+    @api.model
+    def _from_download_token(self, token):
+        """In-memory wizard with the filters of a download token.
 
-        # Create filename with date range
-        filename = f"informe_policial_{self.date_from}_{self.date_to}.xlsx"
+        Raises:
+            AccessError: the token is forged, expired or belongs to another user
+        """
+        payload, __, signature = (token or '').rpartition('.')
+        if not payload or not consteq(signature, hmac(self.env(su=True), DOWNLOAD_TOKEN_SCOPE, payload)):
+            raise AccessError('Enlace de descarga no válido.')
+        filters = json.loads(base64.urlsafe_b64decode(payload))
+        if filters.pop('uid') != self.env.uid or filters.pop('exp') < time.time():
+            raise AccessError('Enlace de descarga caducado.')
+        filters['warehouse_ids'] = [fields.Command.set(filters['warehouse_ids'])]
+        return self.new(filters)
+
+    def _iter_live_rows(self, group=None, chunk_size=EXCEL_CHUNK_SIZE):
+        """Yield Excel rows page by page, straight from the database.
+
+        Each page is one joined SQL query; no record goes through the ORM,
+        so the cost is dominated by writing the file.
+        """
+        after = None
+        while True:
+            rows = self._fetch_police_rows(after, chunk_size, group=group)
+            if not rows:
+                return
+            yield from rows
+            after = rows[-1]['key']
+
+    def _get_report_groups(self):
+        """(date, warehouse_id) pairs with lines matching the filters, newest first."""
+        self.ensure_one()
+        where, params = self._get_police_lines_where()
+        if not where:
+            return []
+        self.env.cr.execute(f"""
+            SELECT DISTINCT o.date, o.warehouse_id
+              FROM jewelry_client_purchase_line l
+              JOIN jewelry_client_purchase o ON o.id = l.order_id
+             WHERE {where}
+          ORDER BY o.date DESC, o.warehouse_id NULLS LAST
+        """, params)
+        return self.env.cr.fetchall()
+
+    def _row_matches(self, row, states):
+        """Whether a cached fragment row passes the state and operation filters."""
+        return row['state'] in states and (
+            self.operation_type not in ('purchase', 'recoverable')
+            or row['operation_type'] == self.operation_type
+        )
 
-        # Save file data
-        self.write({
-            'file_data': file_content,
-            'file_name': filename,
-        })
+    def _iter_excel_data(self, chunk_size=EXCEL_CHUNK_SIZE):
+        """Yield Excel rows in report order.
 
-        # Return download action
-        return {
-            'type': 'ir.actions.act_url',
-            'url': f'/web/content/{self._name}/{self.id}/file_data/{filename}?download=true',
-            'target': 'new',
-        }
+        Past days come from the daily fragments built overnight, filtered
+        in memory; days without a fragment (today, or invalidated ones) are
+        read live. Rows of the stores of a same day are merged back into
+        the report order, so the output does not depend on the source.
+        """
+        self.ensure_one()
+        self.env['jewelry.client.purchase.line'].check_access('read')
+        self.env.flush_all()
+        groups = self._get_report_groups()
+        fragments = self.env['jewelry.report.police.fragment']._get_fragments(groups)
+        states = set(self._get_selected_states())
+        for __, day_groups in groupby(groups, key=itemgetter(0)):
+            sources = []
+            for group in day_groups:
+                fragment = fragments.get(group)
+                if fragment:
+                    sources.append([row for row in fragment.rows if self._row_matches(row, states)])
+                else:
+                    sources.append(self._iter_live_rows(group, chunk_size))
+            # Mismo día: orden por id de orden descendente, secuencia e id de línea
+            yield from heapq.merge(*sources, key=lambda row: (-row['key'][1], row['key'][2], row['key'][3]))
+
+    def _export_excel_to_file(self, path):
+        """Write the police Excel to `path` in constant memory.
+
+        Returns:
+            Number of rows written
+        """
+        from ..report.police_report_excel import PoliceReportExcel
 
-    def _generate_pdf(self, lines):
-        """Generate PDF report and return download action."""
-        import logging
-        _logger = logging.getLogger(__name__)
+        return PoliceReportExcel().generate_to_file(self._iter_excel_data(), path)
 
-        # Get unique purchases from lines
-        purchases = lines.mapped('order_id')
+    def _get_download_filename(self):
+        extension = DOWNLOAD_FORMATS[self.output_format][0]
+        return f"informe_policial_{self.date_from}_{self.date_to}.{extension}"
 
-        _logger.info(f"PDF Generation - Lines: {len(lines)}, Purchases: {purchases.ids}")
+    def _iter_download(self):
+        """Yield the bytes of the report in the selected format."""
+        self.ensure_one()
+        if self.output_format == 'pdf_zip':
+            # Solo trozos con datos: uno vacío cerraría la respuesta por trozos
+            yield from (data for data in self._iter_pdf_zip() if data)
+            return
+        export = self._export_excel_to_file if self.output_format == 'excel' else self._export_pdf_to_file
+        # Un .xlsx o un PDF solo son válidos una vez cerrados: se generan en
+        # un temporal, borrado al abrirlo, y se envían desde disco
+        fd, path = tempfile.mkstemp(prefix='police_report_')
+        os.close(fd)
+        try:
+            export(path)
+            file = open(path, 'rb')
+        finally:
+            os.unlink(path)
+        with file:
+            yield from iter(lambda: file.read(DOWNLOAD_CHUNK_SIZE), b'')
+
+    def _get_pdf_orders(self, group=None):
+        """Orders with lines matching the filters, in report order."""
+        self.ensure_one()
+        where, params = self._get_police_lines_where(group)
+        Order = self.env['jewelry.client.purchase']
+        if not where:
+            return Order.browse()
+        Order.check_access('read')
+        self.env.flush_all()
+        self.env.cr.execute(f"""
+            SELECT o.id
+              FROM jewelry_client_purchase o
+             WHERE EXISTS (
+                   SELECT 1 FROM jewelry_client_purchase_line l WHERE l.order_id = o.id
+               )
+               AND {where}
+          ORDER BY o.date DESC, o.id DESC
+        """, params)
+        return Order.browse([row[0] for row in self.env.cr.fetchall()])
+
+    def _get_pdf_parts(self):
+        """Parts of the PDF by day and store, newest first.
+
+        A day and store is taken from its daily fragment when the fragment
+        holds exactly the orders selected by the filters; otherwise its
+        orders are rendered live.
+
+        Returns:
+            list of fragments and order recordsets, see `PoliceReportPdf.assemble_to_file`
+        """
+        orders = self._get_pdf_orders()
+        fragments = self.env['jewelry.report.police.fragment']._get_fragments(
+            (order.date, order.warehouse_id.id) for order in orders
+        )
+        by_group = {}
+        for order in orders:
+            by_group.setdefault((order.date, order.warehouse_id.id), []).append(order.id)
+        parts = []
+        for group in sorted(by_group, key=lambda g: (g[0], -(g[1] or float('inf'))), reverse=True):
+            fragment = fragments.get(group)
+            if fragment and fragment.order_ids == by_group[group]:
+                parts.append(fragment)
+            else:
+                parts.append(orders.browse(by_group[group]))
+        return parts
+
+    def _export_pdf_to_file(self, path):
+        """Write the police PDF to `path`, rendered by chunks of orders.
+
+        Returns:
+            Page index, see `PoliceReportPdf.generate_to_file`
+        """
+        from ..report.police_report_pdf import PoliceReportPdf
 
-        if not purchases:
+        parts = self._get_pdf_parts()
+        if not parts:
             raise UserError('No se encontraron compras para generar el PDF.')
+        return PoliceReportPdf(self.env).assemble_to_file(parts, path)
+
+    def _iter_pdf_zip(self):
+        """Yield a zip with one PDF per day and store, as each PDF is ready.
 
-        # Use standard report action
-        return self.env.ref('jewelry_report.action_report_police_pdf').report_action(purchases)
+        The zip is written to a non-seekable stream, so every entry is sent
+        as soon as it is compressed and only one PDF is on disk at a time.
+        """
+        from ..report.police_report_pdf import PoliceReportPdf
+
+        parts = self._get_pdf_parts()
+        if not parts:
+            raise UserError('No se encontraron compras para generar el PDF.')
+        generator = PoliceReportPdf(self.env)
+        stream = _ZipStream()
+        with tempfile.TemporaryDirectory(prefix='police_zip_') as tmpdir, \
+                zipfile.ZipFile(stream, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for index, part in enumerate(parts):
+                if part._name == 'jewelry.report.police.fragment':
+                    date, store = part.date, part.warehouse_id.name
+                else:
+                    date, store = part[0].date, part[0].warehouse_id.name
+                name = f"informe_policial_{date}_{(store or 'sin_tienda').replace('/', '_')}.pdf"
+                path = os.path.join(tmpdir, f'{index:05d}.pdf')
+                generator.assemble_to_file([part], path)
+                with open(path, 'rb') as file, archive.open(name, 'w') as entry:
+                    for data in iter(lambda: file.read(DOWNLOAD_CHUNK_SIZE), b''):
+                        entry.write(data)
+                        yield stream.pop()
+                os.unlink(path)
+                yield stream.pop()
+        # Directorio central del zip, escrito al cerrarlo
+        yield stream.pop()